@@ -2,33 +2,48 @@ import streamlit as st
 import pandas as pd
 import re
 import io
+import os
+import hashlib
+import html
+import pickle
+import importlib
+import importlib.util
 import zipfile
 from datetime import datetime
 import logging
-import traceback
+import multiprocessing
+import functools
+import itertools
+import operator
+from collections import namedtuple, OrderedDict
 from pathlib import Path
 from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
-# PDF processing libraries
-try:
-    import pdfplumber
-    PDFPLUMBER_AVAILABLE = True
-except ImportError:
-    PDFPLUMBER_AVAILABLE = False
-
-try:
-    import fitz  # PyMuPDF
-    PYMUPDF_AVAILABLE = True
-except ImportError:
-    PYMUPDF_AVAILABLE = False
-
-try:
-    import openpyxl
-    from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
-    from openpyxl.utils.dataframe import dataframe_to_rows
-    OPENPYXL_AVAILABLE = True
-except ImportError:
-    OPENPYXL_AVAILABLE = False
+# PDF processing libraries; only probed here and imported on first use, since
+# loading them dominates the app's cold start
+PDFPLUMBER_AVAILABLE = importlib.util.find_spec("pdfplumber") is not None
+PYMUPDF_AVAILABLE = importlib.util.find_spec("fitz") is not None  # PyMuPDF
+XLSXWRITER_AVAILABLE = importlib.util.find_spec("xlsxwriter") is not None
+
+@functools.lru_cache(maxsize=None)
+def optional_module(name):
+    """Import an optional dependency the first time it is needed"""
+    return importlib.import_module(name)
+
+# Cell formats for the ECR workbook, registered once per workbook
+ECR_EXCEL_FORMATS = {
+    'title': {'font_name': 'Arial', 'font_size': 14, 'bold': True},
+    'section': {'font_name': 'Arial', 'font_size': 12, 'bold': True},
+    'summary_header': {'font_name': 'Arial', 'font_size': 12, 'bold': True, 'bg_color': '#D9E1F2',
+                       'align': 'center', 'valign': 'vcenter', 'border': 1},
+    'summary_value': {'font_name': 'Arial', 'font_size': 10, 'align': 'center', 'valign': 'vcenter', 'border': 1},
+    'table_header': {'font_name': 'Arial', 'font_size': 10, 'bold': True, 'bg_color': '#E2EFDA',
+                     'align': 'center', 'valign': 'vcenter', 'border': 1},
+    'body': {'font_name': 'Arial', 'font_size': 9, 'border': 1},
+    'body_center': {'font_name': 'Arial', 'font_size': 9, 'align': 'center', 'valign': 'vcenter', 'border': 1},
+}
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -70,6 +85,52 @@ def safe_numeric_convert_challan(value, is_integer=False):
     except (ValueError, TypeError):
         return value  # Return original if conversion fails
 
+def pdf_digest(pdf_bytes):
+    """Short content hash identifying an uploaded PDF by its bytes"""
+    return hashlib.blake2b(pdf_bytes, digest_size=16).digest()
+
+# Worker processes are started fresh rather than forked: forking Streamlit's
+# multi-threaded server can copy locks held by other threads into the workers
+POOL_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+# Each fresh worker imports the app and its libraries (~0.75 s); smaller batches of
+# PDFs (~2 s of parsing on one core) finish sooner in this process
+PROCESS_POOL_MIN_BYTES = 4 * 1024 * 1024
+
+def map_in_processes(func, items, item_size=None):
+    """Yield func(item) for each item in order, spreading the work over CPU cores
+
+    item_size maps an item to its PDF size in bytes; when given, batches below
+    PROCESS_POOL_MIN_BYTES in total are run serially.
+    """
+    items = list(items)
+    done = 0
+    workers = min(os.cpu_count() or 1, len(items))
+    if workers > 1 and item_size is not None and sum(map(item_size, items)) < PROCESS_POOL_MIN_BYTES:
+        workers = 1
+    
+    if workers > 1:
+        try:
+            pool_func = func
+            if func.__module__ == '__main__':
+                # Streamlit runs this script as __main__, which worker processes cannot
+                # import; resolve the function through the importable module instead
+                pool_func = getattr(importlib.import_module(Path(__file__).stem), func.__name__)
+            mp_context = multiprocessing.get_context(POOL_START_METHOD)
+            with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context) as executor:
+                for result in executor.map(pool_func, items):
+                    done += 1
+                    yield result
+        # OSError and NotImplementedError come from hosts that cannot start processes
+        # at all, e.g. without /dev/shm or POSIX semaphores
+        except (BrokenProcessPool, pickle.PicklingError, ImportError, AttributeError,
+                OSError, NotImplementedError) as e:
+            logger.warning(f"Process pool unavailable, continuing serially: {str(e)}")
+    
+    for item in items[done:]:
+        yield func(item)
+
+@functools.lru_cache(maxsize=1024)
 def extract_month_from_text(text):
     """Extract month name from the contribution history line"""
     try:
@@ -128,107 +189,281 @@ def extract_month_from_text(text):
 # ESIC CONTRIBUTION HISTORY EXTRACTOR
 # ============================================================================
 
-def extract_esic_data(pdf_file):
-    """Extract ESIC ecr data from PDF while preserving structure"""
+# Precompiled patterns used while scanning ECR pages and employee rows
+# Searched from the 'ECR Of' / 'Contribution History' prefix, so no lazy '.*?' is needed
+_RE_ECR_HEADER = re.compile(r'Of\s+(\d+)\s+for\s+([A-Za-z]+\d+)')
+_RE_EMPLOYEE_ANCHOR = re.compile(r'^\d+\s+-\s+\d{10}')
+_RE_IP10 = re.compile(r'^\d{10}$')
+_REASON_TOKENS = frozenset(['no', 'work', 'left', 'service', 'servic', '-', 'absent'])
+# Column labels of a parsed employee record, in EmployeeRow field order
+ECR_COLUMNS = (
+    'SNo.', 'Is Disable', 'IP Number', 'IP Name', 'No. Of Days', 'Total Wages', 'IP Contribution', 'Reason', 'Month',
+    'Total IP Contribution', 'Total Employer Contribution', 'Total Contribution',
+    'Total Government Contribution', 'Total Monthly Wages'
+)
+ECR_COLUMN_INDEX = {label: i for i, label in enumerate(ECR_COLUMNS)}
+EmployeeRow = namedtuple('EmployeeRow', [
+    'sno', 'is_disable', 'ip_number', 'ip_name', 'days', 'wages', 'contribution', 'reason', 'month',
+    'total_ip_contribution', 'total_employer_contribution', 'total_contribution',
+    'total_government_contribution', 'total_monthly_wages'
+])
+
+_RE_PRINTED = re.compile(r'Printed On:\s*([^\n]+)')
+_RE_PAGE = re.compile(r'Page\s+(\d+)\s+of\s+(\d+)')
+
+# Sort keys for PyMuPDF word tuples (x0, y0, x1, y1, text, ...)
+_WORD_TOP_LEFT = operator.itemgetter(1, 0)
+_WORD_LEFT = operator.itemgetter(0)
+
+def extract_page_text_pymupdf(page, y_tolerance=3):
+    """Rebuild pdfplumber-style text lines from PyMuPDF words grouped by vertical position"""
+    words = sorted(page.get_text("words"), key=_WORD_TOP_LEFT)
+    lines = []
+    current_line = []
+    current_top = None
+    
+    for word in words:
+        if current_top is None or abs(word[1] - current_top) > y_tolerance:
+            if current_line:
+                lines.append(current_line)
+            current_line = []
+            current_top = word[1]
+        current_line.append(word)
+    if current_line:
+        lines.append(current_line)
+    
+    return '\n'.join(' '.join(w[4] for w in sorted(line, key=_WORD_LEFT)) for line in lines)
+
+
+def iter_ecr_page_texts(pdf_file):
+    """Yield the text of each ECR page, preferring PyMuPDF over pdfplumber for speed"""
+    pdf_bytes = pdf_file if isinstance(pdf_file, (bytes, bytearray)) else pdf_file.read()
+    pages_done = 0
+    
+    if PYMUPDF_AVAILABLE:
+        try:
+            with optional_module("fitz").open(stream=pdf_bytes, filetype="pdf") as doc:
+                for page in doc:
+                    page_text = extract_page_text_pymupdf(page)
+                    pages_done += 1
+                    yield page_text
+            return
+        except Exception as e:
+            if not PDFPLUMBER_AVAILABLE:
+                raise
+            # Pages already yielded are not read again
+            logger.warning(f"PyMuPDF could not read the PDF from page {pages_done + 1}, "
+                           f"continuing with pdfplumber: {str(e)}")
+    
+    with optional_module("pdfplumber").open(io.BytesIO(pdf_bytes)) as pdf:
+        for page in pdf.pages[pages_done:]:
+            yield page.extract_text()
+
+
+def report_error(message, errors=None):
+    """Show an error in the app, or collect it when errors is a list
+
+    st.error has no page to show on inside a worker process, so work done there
+    collects its messages and hands them back with the result.
+    """
+    if errors is None:
+        st.error(message)
+    else:
+        errors.append(message)
+
+def extract_esic_data(pdf_file, errors=None):
+    """Extract ESIC ecr data from PDF (file object or raw bytes) while preserving structure"""
     try:    
-        with pdfplumber.open(pdf_file) as pdf:
-            extracted_data = {
-                'header_info': {},
-                'summary_info': {},
-                'employee_data': [],
-                'footer_info': {}
-            }
+        extracted_data = {
+            'header_info': {},
+            'summary_info': {},
+            'employee_data': [],
+            'footer_info': {}
+        }
+       
+        # Header and summary lead each ECR; only header lines are looked for once both are
+        # found, since a merged PDF can start another ECR with its own header and summary
+        header_done = False
+        
+        # Process each page
+        for text in iter_ecr_page_texts(pdf_file):
+            if not text:
+                continue
            
-            # Process each page
-            for page_num, page in enumerate(pdf.pages):
-                text = page.extract_text()
-                if not text:
-                    continue
-               
-                lines = text.split('\n')
-               
-                # Extract header information including month
-                for i, line in enumerate(lines):
-                    if 'ECR Of' in line or 'Contribution History' in line:
-                        # Extract establishment code and period
-                        match = re.search(r'(ECR Of|Contribution History.*?Of)\s+(\d+)\s+for\s+([A-Za-z]+\d+)', line)
-                        if match:
-                            extracted_data['header_info']['establishment_code'] = match.group(2)
-                            extracted_data['header_info']['period'] = match.group(3)
-                            # Extract month name
-                            extracted_data['header_info']['month'] = extract_month_from_text(line)
-                   
-                    elif "Employees' State Insurance Corporation" in line:
+            # Single pass over the page: header/summary lines (until found) and
+            # employee rows (until the section's page/printed footer)
+            employee_section_started = False
+            employee_section_ended = False
+            employee_rows = []
+            # The summary totals are printed on the line after the summary label
+            summary_amounts_next = False
+            
+            for line in text.splitlines():
+                if summary_amounts_next:
+                    summary_amounts_next = False
+                    # Extract summary totals
+                    amounts = [token for token in line.split() if token[:1].isdigit()]
+                    if len(amounts) >= 5:
+                        extracted_data['summary_info'] = {
+                            'total_ip_contribution': amounts[0],
+                            'total_employer_contribution': amounts[1],
+                            'total_contribution': amounts[2],
+                            'total_government_contribution': amounts[3],
+                            'total_monthly_wages': amounts[4]
+                        }
+                
+                # Plain substring tests; checked in the original header > organisation > summary order
+                ecr_pos = line.find('ECR Of')
+                history_pos = line.find('Contribution History')
+                if ecr_pos >= 0 or history_pos >= 0:
+                    # A header starts a new ECR, whose summary is still to come
+                    header_done = False
+                    # Extract establishment code and period
+                    match = _RE_ECR_HEADER.search(line, min(pos for pos in (ecr_pos, history_pos) if pos >= 0))
+                    if match:
+                        extracted_data['header_info']['establishment_code'] = match.group(1)
+                        extracted_data['header_info']['period'] = match.group(2)
+                        # Extract month name
+                        extracted_data['header_info']['month'] = extract_month_from_text(line)
+                
+                elif not header_done:
+                    if "Employees' State Insurance Corporation" in line:
                         extracted_data['header_info']['organization'] = line.strip()
-                   
+                    
                     elif 'Total IP Contribution' in line and 'Total Employer Contribution' in line:
-                        # Extract summary totals
-                        next_line = lines[i + 1] if i + 1 < len(lines) else ""
-                        amounts = re.findall(r'[\d,]+\.?\d*', next_line)
-                        if len(amounts) >= 5:
-                            extracted_data['summary_info'] = {
-                                'total_ip_contribution': amounts[0],
-                                'total_employer_contribution': amounts[1],
-                                'total_contribution': amounts[2],
-                                'total_government_contribution': amounts[3],
-                                'total_monthly_wages': amounts[4]
-                            }
-               
-                # Extract employee table data using text parsing approach
-                employee_section_started = False
-                employee_rows = []
+                        summary_amounts_next = True
                 
-                for line in lines:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    
-                    # Check if this line contains employee data pattern
-                    if re.search(r'^\d+\s+-\s+\d{10}', line):
-                        employee_section_started = True
-                        employee_rows.append(line)
-                    elif employee_section_started and re.match(r'^\d+', line):
-                        if not re.search(r'^\d+\s+-\s+\d{10}', line):
-                            parts = line.split()
-                            has_ip_pattern = False
-                            for i, part in enumerate(parts):
-                                if re.match(r'^\d{10}$', part) and i > 0:
-                                    has_ip_pattern = True
-                                    break
-                            
-                            if has_ip_pattern:
-                                employee_rows.append(line)
-                            else:
-                                if employee_rows:
-                                    employee_rows[-1] += ' ' + line
-                    elif employee_section_started and line.lower().startswith(('page', 'printed')):
-                        break
+                if employee_section_ended:
+                    # Past the employee table only header lines are still of interest
+                    continue
                 
-                # Process employee rows
-                for row_text in employee_rows:
-                    employee_record = parse_employee_row_improved(row_text, extracted_data['summary_info'], extracted_data['header_info'])
-                    if employee_record:
-                        extracted_data['employee_data'].append(employee_record)
-
-                # Extract footer information
-                if 'Printed On:' in text:
-                    match = re.search(r'Printed On:\s*([^\n]+)', text)
-                    if match:
-                        extracted_data['footer_info']['printed_on'] = match.group(1).strip()
-               
-                if 'Page' in text:
-                    match = re.search(r'Page\s+(\d+)\s+of\s+(\d+)', text)
-                    if match:
-                        extracted_data['footer_info']['page_info'] = f"Page {match.group(1)} of {match.group(2)}"
+                stripped = line.strip()
+                if not stripped:
+                    continue
+                
+                # Check if this line contains employee data pattern
+                # (cheap first-character test before touching the regex engine)
+                starts_with_digit = stripped[:1].isdigit()
+                if starts_with_digit and _RE_EMPLOYEE_ANCHOR.match(stripped):
+                    employee_section_started = True
+                    employee_rows.append([stripped])
+                elif employee_section_started and starts_with_digit:
+                    parts = stripped.split()
+                    has_ip_pattern = False
+                    for j, part in enumerate(parts):
+                        if _RE_IP10.match(part) and j > 0:
+                            has_ip_pattern = True
+                            break
+                    
+                    if has_ip_pattern:
+                        employee_rows.append([stripped])
+                    else:
+                        if employee_rows:
+                            # Wrapped continuation of the previous row; joined once below
+                            employee_rows[-1].append(stripped)
+                elif employee_section_started and stripped.lower().startswith(('page', 'printed')):
+                    employee_section_ended = True
+            
+            header_done = bool(extracted_data['summary_info']) and 'establishment_code' in extracted_data['header_info']
+            
+            # Process employee rows
+            for row_lines in employee_rows:
+                employee_record = parse_employee_row_improved(' '.join(row_lines), extracted_data['summary_info'], extracted_data['header_info'], errors)
+                if employee_record:
+                    extracted_data['employee_data'].append(employee_record)
+
+            # Extract footer information
+            if 'Printed On:' in text:
+                match = _RE_PRINTED.search(text)
+                if match:
+                    extracted_data['footer_info']['printed_on'] = match.group(1).strip()
+           
+            if 'Page' in text:
+                match = _RE_PAGE.search(text)
+                if match:
+                    extracted_data['footer_info']['page_info'] = f"Page {match.group(1)} of {match.group(2)}"
 
         return extracted_data
    
     except Exception as e:
-        st.error(f"Error extracting data: {str(e)}")
+        report_error(f"Error extracting data: {str(e)}", errors)
         return None
 
+def extract_esic_data_with_errors(pdf_bytes):
+    """(extract_esic_data result, error messages) for one PDF, for use in worker processes"""
+    errors = []
+    return extract_esic_data(pdf_bytes, errors), errors
+
+
+# Number of extracted ECR files kept across reruns
+ECR_RESULT_CACHE_SIZE = 256
+
+@st.cache_resource
+def ecr_result_cache():
+    """(extracted ECR data, error messages) by PDF digest, kept across reruns and sessions"""
+    return OrderedDict()
+
+def extract_esic_data_batch(pdf_contents):
+    """Yield (data, error messages) for PDF bytes in order, only parsing files not seen before"""
+    cache = ecr_result_cache()
+    order = []
+    known = {}
+    pending = {}
+    for pdf_bytes in pdf_contents:
+        cache_key = pdf_digest(pdf_bytes)
+        order.append(cache_key)
+        # pop and re-insert marks the entry recently used without racing other sessions
+        result = cache.pop(cache_key, None)
+        if result is not None:
+            cache[cache_key] = known[cache_key] = result
+        elif cache_key not in pending:
+            pending[cache_key] = pdf_bytes
+    
+    new_results = map_in_processes(extract_esic_data_with_errors, pending.values(), item_size=len)
+    for cache_key in order:
+        if cache_key not in known:
+            known[cache_key] = result = next(new_results)
+            # Failed extractions are retried rather than remembered
+            if result[0] is not None:
+                cache[cache_key] = result
+                while len(cache) > ECR_RESULT_CACHE_SIZE:
+                    cache.popitem(last=False)
+        yield known[cache_key]
+
+
+def is_amount_token(token):
+    """True for plain digits with optional two-digit decimals (e.g. '26', '900.00')"""
+    whole, dot, fraction = token.partition('.')
+    if not whole.isdecimal():
+        return False
+    return not dot or (len(fraction) == 2 and fraction.isdecimal())
+
+
+def classify_row_tokens(tokens):
+    """Split the tokens after the IP Number into name parts, numeric values and text values"""
+    # The name runs up to the first numeric (days, wages, contribution) or reason token
+    split_index = 0
+    while (split_index < len(tokens)
+           and not is_amount_token(tokens[split_index].replace(',', ''))
+           and tokens[split_index].casefold() not in _REASON_TOKENS):
+        split_index += 1
+    
+    name_parts = tokens[:split_index]
+    numeric_values = []
+    text_values = []
+    
+    for token in tokens[split_index:]:
+        clean_token = token.replace(',', '')
+        if is_amount_token(clean_token):
+            numeric_values.append(clean_token)
+        else:
+            # Reason words and any other trailing text
+            text_values.append(token)
+    
+    return name_parts, numeric_values, text_values
+
 
-def parse_employee_row_improved(row_text, summary_info, header_info):
+def parse_employee_row_improved(row_text, summary_info, header_info, errors=None):
     """Parse individual employee row with improved logic for handling names and data"""
     try:
         row_text = row_text.strip()
@@ -245,7 +480,7 @@ def parse_employee_row_improved(row_text, summary_info, header_info):
         ip_index = -1
         
         for i, part in enumerate(parts):
-            if re.match(r'^\d{10}$', part):
+            if _RE_IP10.match(part):
                 ip_number = part
                 ip_index = i
                 break
@@ -253,39 +488,14 @@ def parse_employee_row_improved(row_text, summary_info, header_info):
         if not ip_number or ip_index < 2:  # Should have at least SNo and Is_Disable before IP
             return None
         
+        # Everything after IP number is name, then numeric values and reason text
+        name_parts, numeric_values, text_values = classify_row_tokens(parts[ip_index + 1:])
+        
         # Extract SNo (first part, should be a number)
         sno = parts[0] if parts[0].isdigit() else "1"
         
         # Extract Is Disable (usually "-" and should be right before IP number)
-        is_disable = "-"
-        if ip_index > 0:
-            is_disable = parts[ip_index - 1]
-        
-        # Everything after IP number until we hit numbers is the name
-        name_parts = []
-        data_parts = []
-        
-        # Start collecting name parts after IP number
-        name_started = True
-        for i in range(ip_index + 1, len(parts)):
-            part = parts[i]
-            
-            # Check if this looks like numeric data (days, wages, contribution)
-            if re.match(r'^\d+(\.\d{2})?$', part.replace(',', '')):
-                # This is numeric data
-                name_started = False
-                data_parts.append(part.replace(',', ''))
-            elif re.match(r'^(No|Work|Left|Service|Servic|-|Absent)$', part, re.IGNORECASE):
-                # This is reason
-                name_started = False
-                data_parts.append(part)
-            elif name_started:
-                # This is part of the name
-                name_parts.append(part)
-            else:
-                # We've started collecting data, but this doesn't look like data
-                # This might be reason text
-                data_parts.append(part)
+        is_disable = parts[ip_index - 1]
         
         # Construct the name
         ip_name = ' '.join(name_parts).strip() if name_parts else "UNKNOWN"
@@ -296,16 +506,6 @@ def parse_employee_row_improved(row_text, summary_info, header_info):
         contribution = "0.00"
         reason = "-"
         
-        # Separate numeric values from text values
-        numeric_values = []
-        text_values = []
-        
-        for part in data_parts:
-            if re.match(r'^\d+(\.\d{2})?$', part):
-                numeric_values.append(part)
-            else:
-                text_values.append(part)
-        
         # Assign numeric values (usually in order: days, wages, contribution)
         if len(numeric_values) >= 1:
             if len(numeric_values) == 1:
@@ -339,69 +539,54 @@ def parse_employee_row_improved(row_text, summary_info, header_info):
         if '.' not in contribution:
             contribution += '.00'
         
-        employee_record = {
-            'SNo.': safe_numeric_convert(sno, is_integer=True),
-            'Is Disable': is_disable,
-            'IP Number': ip_number,  # Keep as string for IP numbers
-            'IP Name': ip_name,
-            'No. Of Days': safe_numeric_convert(days, is_integer=True),
-            'Total Wages': safe_numeric_convert(wages),
-            'IP Contribution': safe_numeric_convert(contribution),
-            'Reason': reason,
+        employee_record = EmployeeRow(
+            sno=safe_numeric_convert(sno, is_integer=True),
+            is_disable=is_disable,
+            ip_number=ip_number,  # Keep as string for IP numbers
+            ip_name=ip_name,
+            days=safe_numeric_convert(days, is_integer=True),
+            wages=safe_numeric_convert(wages),
+            contribution=safe_numeric_convert(contribution),
+            reason=reason,
             # Add month from header info
-            'Month': header_info.get('month', 'Not Found'),
+            month=header_info.get('month', 'Not Found'),
             # Add summary columns - convert to numbers
-            'Total IP Contribution': safe_numeric_convert(summary_info.get('total_ip_contribution', '')),
-            'Total Employer Contribution': safe_numeric_convert(summary_info.get('total_employer_contribution', '')),
-            'Total Contribution': safe_numeric_convert(summary_info.get('total_contribution', '')),
-            'Total Government Contribution': safe_numeric_convert(summary_info.get('total_government_contribution', '')),
-            'Total Monthly Wages': safe_numeric_convert(summary_info.get('total_monthly_wages', ''))
-        }
+            total_ip_contribution=safe_numeric_convert(summary_info.get('total_ip_contribution', '')),
+            total_employer_contribution=safe_numeric_convert(summary_info.get('total_employer_contribution', '')),
+            total_contribution=safe_numeric_convert(summary_info.get('total_contribution', '')),
+            total_government_contribution=safe_numeric_convert(summary_info.get('total_government_contribution', '')),
+            total_monthly_wages=safe_numeric_convert(summary_info.get('total_monthly_wages', ''))
+        )
         
         return employee_record
         
     except Exception as e:
-        st.error(f"Error parsing employee row: {row_text}, Error: {e}")
+        report_error(f"Error parsing employee row: {row_text}, Error: {e}", errors)
         return None
 
 
-def format_excel_sheet(worksheet, data, start_row=1):
+def format_excel_sheet(worksheet, data, formats, widths, start_row=0):
     """Apply formatting to Excel sheet to match PDF structure"""
-    if not OPENPYXL_AVAILABLE:
-        return start_row
-   
-    # Define styles
-    header_font = Font(name='Arial', size=12, bold=True)
-    normal_font = Font(name='Arial', size=10)
-    border = Border(left=Side(style='thin'), right=Side(style='thin'),
-                   top=Side(style='thin'), bottom=Side(style='thin'))
-   
-    header_fill = PatternFill(start_color='D9E1F2', end_color='D9E1F2', fill_type='solid')
-    center_alignment = Alignment(horizontal='center', vertical='center')
-   
     current_row = start_row
    
     # Add title/header information
     if 'header_info' in data:
         title = f"ECR Of {data['header_info'].get('establishment_code', '')} for {data['header_info'].get('period', '')}"
-        worksheet.cell(row=current_row, column=1, value=title)
-        worksheet.cell(row=current_row, column=1).font = Font(name='Arial', size=14, bold=True)
-        worksheet.merge_cells(f'A{current_row}:I{current_row}')  # Updated to include month column
+        worksheet.merge_range(current_row, 0, current_row, 8, title, formats['title'])  # Updated to include month column
+        track_column_widths(widths, [title])
         current_row += 1
        
         org_name = data['header_info'].get('organization', '')
         if org_name:
-            worksheet.cell(row=current_row, column=1, value=org_name)
-            worksheet.cell(row=current_row, column=1).font = header_font
-            worksheet.merge_cells(f'A{current_row}:I{current_row}')  # Updated to include month column
+            worksheet.merge_range(current_row, 0, current_row, 8, org_name, formats['section'])  # Updated to include month column
+            track_column_widths(widths, [org_name])
             current_row += 1
         
         # Add month information
         month_info = data['header_info'].get('month', '')
         if month_info and month_info != 'Not Found':
-            worksheet.cell(row=current_row, column=1, value=f"Month: {month_info}")
-            worksheet.cell(row=current_row, column=1).font = header_font
-            worksheet.merge_cells(f'A{current_row}:I{current_row}')
+            worksheet.merge_range(current_row, 0, current_row, 8, f"Month: {month_info}", formats['section'])
+            track_column_widths(widths, [f"Month: {month_info}"])
             current_row += 1
    
     current_row += 1  # Add space
@@ -410,14 +595,7 @@ def format_excel_sheet(worksheet, data, start_row=1):
     if 'summary_info' in data:
         summary_headers = ['Total IP Contribution', 'Total Employer Contribution', 'Total Contribution',
                           'Total Government Contribution', 'Total Monthly Wages']
-       
-        for col, header in enumerate(summary_headers, 1):
-            cell = worksheet.cell(row=current_row, column=col, value=header)
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = center_alignment
-            cell.border = border
-       
+        write_excel_row(worksheet, current_row, summary_headers, formats['summary_header'], widths)
         current_row += 1
        
         summary_values = [
@@ -427,88 +605,86 @@ def format_excel_sheet(worksheet, data, start_row=1):
             safe_numeric_convert(data['summary_info'].get('total_government_contribution', '')),
             safe_numeric_convert(data['summary_info'].get('total_monthly_wages', ''))
         ]
-       
-        for col, value in enumerate(summary_values, 1):
-            cell = worksheet.cell(row=current_row, column=col, value=value)
-            cell.font = normal_font
-            cell.alignment = center_alignment
-            cell.border = border
-       
+        write_excel_row(worksheet, current_row, summary_values, formats['summary_value'], widths)
         current_row += 2  # Add space
    
     return current_row
 
 
+def table_body_formats(formats, headers):
+    """Return the body cell format for each column; numeric columns are centered"""
+    return [formats['body_center'] if any(keyword in header.lower() for keyword in ['contribution', 'wages', 'days', 'sno'])
+            else formats['body'] for header in headers]
+
+
+def track_column_widths(widths, row_values):
+    """Update the longest value length seen per column (0-based) with one row"""
+    for column_index, value in enumerate(row_values):
+        length = len(str(value)) if value else 0
+        if length > widths.get(column_index, -1):
+            widths[column_index] = length
+
+
+def write_excel_row(worksheet, row, values, cell_format, widths):
+    """Write one row with a single format or a list of per-column formats, recording column widths"""
+    if isinstance(cell_format, list):
+        for col, (value, column_format) in enumerate(zip(values, cell_format)):
+            worksheet.write(row, col, value, column_format)
+    else:
+        worksheet.write_row(row, 0, values, cell_format)
+    track_column_widths(widths, values)
+
+
+def fit_column_widths(worksheet, widths):
+    """Size every used column to its longest value plus padding, capped at 50"""
+    for column_index in range(max(widths, default=0) + 1):
+        worksheet.set_column(column_index, column_index, min(widths.get(column_index, 0) + 2, 50))
+
+
+def unique_sheet_name(name, used_names):
+    """Return name (max 31 chars) with a numeric suffix if a sheet already uses it"""
+    candidate = name[:31]  # Excel sheet name limit is 31 chars
+    suffix = 1
+    while candidate.lower() in used_names:
+        candidate = f"{name[:31 - len(str(suffix))]}{suffix}"
+        suffix += 1
+    used_names.add(candidate.lower())
+    return candidate
+
+
 def create_combined_excel(all_data):
     """Create single Excel file with all PDF data in separate sheets"""
-    if not OPENPYXL_AVAILABLE:
-        # Fallback to simple pandas Excel writer
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-            # Combine all employee data
-            all_employee_data = []
-            for file_data in all_data:
-                filename = file_data['filename']
-                data = file_data['data']
-                
-                if 'employee_data' in data and data['employee_data']:
-                    for employee in data['employee_data']:
-                        employee_copy = employee.copy()
-                        employee_copy['Source_File'] = filename.replace('.pdf', '')
-                        all_employee_data.append(employee_copy)
-            
-            if all_employee_data:
-                df = pd.DataFrame(all_employee_data)
-                df.to_excel(writer, sheet_name='Combined_Data', index=False)
-        
-        output.seek(0)
-        return output
-   
-    wb = openpyxl.Workbook()
+    output = BytesIO()
+    # constant_memory streams each row out as it is written instead of keeping the sheet in memory
+    wb = optional_module("xlsxwriter").Workbook(output, {'constant_memory': True, 'strings_to_formulas': False, 'strings_to_urls': False})
     
-    # Remove default sheet
-    wb.remove(wb.active)
+    # Register cell formats once; every cell references one of these
+    formats = {name: wb.add_format(properties) for name, properties in ECR_EXCEL_FORMATS.items()}
     
     # Create combined data sheet first
-    combined_ws = wb.create_sheet("Combined_Data")
+    combined_ws = wb.add_worksheet("Combined_Data")
+    used_sheet_names = {"combined_data"}
     
     # Combine all employee data
     all_employee_data = []
     for file_data in all_data:
-        filename = file_data['filename']
-        data = file_data['data']
-        
-        if 'employee_data' in data and data['employee_data']:
-            for employee in data['employee_data']:
-                employee_copy = employee.copy()
-                employee_copy['Source_File'] = filename.replace('.pdf', '')
-                all_employee_data.append(employee_copy)
+        source_file = file_data['filename'].replace('.pdf', '')
+        for employee in file_data['data'].get('employee_data', []):
+            all_employee_data.append((source_file, employee))
     
+    combined_widths = {}
     if all_employee_data:
         # Create combined data table - Updated headers to include month
         headers = ['Source_File', 'Month', 'SNo.', 'Is Disable', 'IP Number', 'IP Name', 'No. Of Days', 'Total Wages', 'IP Contribution', 'Reason']
+        select_fields = operator.itemgetter(*[ECR_COLUMN_INDEX[header] for header in headers[1:]])
+        body_formats = table_body_formats(formats, headers)
         
-        # Write headers
-        for col, header in enumerate(headers, 1):
-            cell = combined_ws.cell(row=1, column=col, value=header)
-            cell.font = Font(name='Arial', size=10, bold=True)
-            cell.fill = PatternFill(start_color='E2EFDA', end_color='E2EFDA', fill_type='solid')
-            cell.alignment = Alignment(horizontal='center', vertical='center')
-            cell.border = Border(left=Side(style='thin'), right=Side(style='thin'),
-                               top=Side(style='thin'), bottom=Side(style='thin'))
-        
-        # Write combined employee data
-        for row_idx, employee in enumerate(all_employee_data, 2):
-            for col, header in enumerate(headers, 1):
-                value = employee.get(header, '')
-                cell = combined_ws.cell(row=row_idx, column=col, value=value)
-                cell.font = Font(name='Arial', size=9)
-                cell.border = Border(left=Side(style='thin'), right=Side(style='thin'),
-                                   top=Side(style='thin'), bottom=Side(style='thin'))
-                
-                # Center align numeric columns
-                if any(keyword in header.lower() for keyword in ['contribution', 'wages', 'days', 'sno']):
-                    cell.alignment = Alignment(horizontal='center', vertical='center')
+        write_excel_row(combined_ws, 0, headers, formats['table_header'], combined_widths)
+        for row_idx, (source_file, employee) in enumerate(all_employee_data, 1):
+            write_excel_row(combined_ws, row_idx, (source_file, *select_fields(employee)), body_formats, combined_widths)
+    
+    # Auto-adjust column widths for combined sheet
+    fit_column_widths(combined_ws, combined_widths)
     
     # Create individual sheets for each PDF
     for file_data in all_data:
@@ -516,92 +692,41 @@ def create_combined_excel(all_data):
         data = file_data['data']
         
         # Create sheet name (Excel sheet names have limitations)
-        sheet_name = filename.replace('.pdf', '')[:31]  # Excel sheet name limit is 31 chars
-        ws = wb.create_sheet(sheet_name)
+        ws = wb.add_worksheet(unique_sheet_name(filename.replace('.pdf', ''), used_sheet_names))
+        sheet_widths = {}
         
         # Format the individual sheet
-        current_row = format_excel_sheet(ws, data)
+        current_row = format_excel_sheet(ws, data, formats, sheet_widths)
         
         # Add employee data table
         if 'employee_data' in data and data['employee_data']:
             # Updated headers to include month
             headers = ['Month', 'SNo.', 'Is Disable', 'IP Number', 'IP Name', 'No. Of Days', 'Total Wages', 'IP Contribution', 'Reason']
+            select_fields = operator.itemgetter(*[ECR_COLUMN_INDEX[header] for header in headers])
+            body_formats = table_body_formats(formats, headers)
            
-            # Write headers
-            for col, header in enumerate(headers, 1):
-                cell = ws.cell(row=current_row, column=col, value=header)
-                cell.font = Font(name='Arial', size=10, bold=True)
-                cell.fill = PatternFill(start_color='E2EFDA', end_color='E2EFDA', fill_type='solid')
-                cell.alignment = Alignment(horizontal='center', vertical='center')
-                cell.border = Border(left=Side(style='thin'), right=Side(style='thin'),
-                                   top=Side(style='thin'), bottom=Side(style='thin'))
-           
+            write_excel_row(ws, current_row, headers, formats['table_header'], sheet_widths)
             current_row += 1
            
             # Write employee data
             for employee in data['employee_data']:
-                for col, header in enumerate(headers, 1):
-                    value = employee.get(header, '')
-                    cell = ws.cell(row=current_row, column=col, value=value)
-                    cell.font = Font(name='Arial', size=9)
-                    cell.border = Border(left=Side(style='thin'), right=Side(style='thin'),
-                                       top=Side(style='thin'), bottom=Side(style='thin'))
-                   
-                    # Center align numeric columns
-                    if any(keyword in header.lower() for keyword in ['contribution', 'wages', 'days', 'sno']):
-                        cell.alignment = Alignment(horizontal='center', vertical='center')
-               
+                write_excel_row(ws, current_row, select_fields(employee), body_formats, sheet_widths)
                 current_row += 1
         
         # Add footer information
         if 'footer_info' in data:
             current_row += 1
             if 'page_info' in data['footer_info']:
-                ws.cell(row=current_row, column=1, value=data['footer_info']['page_info'])
+                write_excel_row(ws, current_row, [data['footer_info']['page_info']], None, sheet_widths)
                 current_row += 1
            
             if 'printed_on' in data['footer_info']:
-                ws.cell(row=current_row, column=1, value=f"Printed On: {data['footer_info']['printed_on']}")
+                write_excel_row(ws, current_row, [f"Printed On: {data['footer_info']['printed_on']}"], None, sheet_widths)
         
         # Auto-adjust column widths for individual sheets
-        from openpyxl.utils import get_column_letter
-        
-        for column_cells in ws.columns:
-            max_length = 0
-            column_index = column_cells[0].column
-            column_letter = get_column_letter(column_index)
-           
-            for cell in column_cells:
-                try:
-                    if cell.value:
-                        max_length = max(max_length, len(str(cell.value)))
-                except:
-                    pass
-           
-            adjusted_width = min(max_length + 2, 50)
-            ws.column_dimensions[column_letter].width = adjusted_width
+        fit_column_widths(ws, sheet_widths)
     
-    # Auto-adjust column widths for combined sheet
-    from openpyxl.utils import get_column_letter
-    
-    for column_cells in combined_ws.columns:
-        max_length = 0
-        column_index = column_cells[0].column
-        column_letter = get_column_letter(column_index)
-       
-        for cell in column_cells:
-            try:
-                if cell.value:
-                    max_length = max(max_length, len(str(cell.value)))
-            except:
-                pass
-       
-        adjusted_width = min(max_length + 2, 50)
-        combined_ws.column_dimensions[column_letter].width = adjusted_width
-    
-    # Save to BytesIO
-    output = BytesIO()
-    wb.save(output)
+    wb.close()
     output.seek(0)
     return output
 
@@ -610,50 +735,270 @@ def create_combined_excel(all_data):
 # ESIC CHALLAN EXTRACTOR
 # ============================================================================
 
+# Challan field patterns, tried in order (case-insensitive) until one matches
+CHALLAN_FIELD_PATTERNS = {
+    'transaction_status': (
+        r'status[:\s]*([^\n\r]+)',
+        r'transaction\s*status[:\s]*([^\n\r]+)',
+        r'payment\s*status[:\s]*([^\n\r]+)'
+    ),
+    'employer_code': (
+        r'employer[\'s\s]*code[:\s]*(\d+)',
+        r'code\s*no[:\s]*(\d+)',
+        r'employer\s*no[:\s]*(\d+)'
+    ),
+    'employer_name': (
+        r'employer[\'s\s]*name[:\s]*([^\n\r]+)',
+        r'name\s*of\s*employer[:\s]*([^\n\r]+)',
+        r'establishment[:\s]*([^\n\r]+)'
+    ),
+    'challan_period': (
+        r'challan\s*period[:\s]*([^\n\r]+)',
+        r'period[:\s]*([^\n\r]+)',
+        r'contribution\s*period[:\s]*([^\n\r]+)'
+    ),
+    'challan_number': (
+        r'challan\s*no[:\s]*([A-Z0-9\-\/]+)',
+        r'challan\s*number[:\s]*([A-Z0-9\-\/]+)',
+        r'receipt\s*no[:\s]*([A-Z0-9\-\/]+)'
+    ),
+    'challan_created_date': (
+        r'created\s*date[:\s]*(\d{1,2}[-\/]\d{1,2}[-\/]\d{4})',
+        r'generation\s*date[:\s]*(\d{1,2}[-\/]\d{1,2}[-\/]\d{4})',
+        r'date\s*of\s*creation[:\s]*(\d{1,2}[-\/]\d{1,2}[-\/]\d{4})'
+    ),
+    'challan_submitted_date': (
+        r'submitted\s*date[:\s]*(\d{1,2}[-\/]\d{1,2}[-\/]\d{4})',
+        r'payment\s*date[:\s]*(\d{1,2}[-\/]\d{1,2}[-\/]\d{4})',
+        r'transaction\s*date[:\s]*(\d{1,2}[-\/]\d{1,2}[-\/]\d{4})'
+    ),
+    'amount_paid': (
+        r'amount\s*paid[:\s]*₹?\s*([0-9,]+\.?\d*)',
+        r'total\s*amount[:\s]*₹?\s*([0-9,]+\.?\d*)',
+        r'paid\s*amount[:\s]*₹?\s*([0-9,]+\.?\d*)'
+    ),
+    'transaction_number': (
+        # Enhanced patterns for transaction numbers
+        r'transaction\s*(?:no|number|id)[:\s]*([A-Z0-9\-\/\.]+)',
+        r'txn\s*(?:no|number|id)[:\s]*([A-Z0-9\-\/\.]+)',
+        r'reference\s*(?:no|number|id)[:\s]*([A-Z0-9\-\/\.]+)',
+        r'utr\s*(?:no|number)[:\s]*([A-Z0-9\-\/\.]+)',
+        r'bank\s*reference\s*(?:no|number)[:\s]*([A-Z0-9\-\/\.]+)',
+        r'payment\s*reference\s*(?:no|number)[:\s]*([A-Z0-9\-\/\.]+)',
+        r'ref\s*(?:no|number)[:\s]*([A-Z0-9\-\/\.]+)',
+        r'acknowledgment\s*(?:no|number)[:\s]*([A-Z0-9\-\/\.]+)',
+        r'ack\s*(?:no|number)[:\s]*([A-Z0-9\-\/\.]+)',
+        r'receipt\s*(?:no|number)[:\s]*([A-Z0-9\-\/\.]+)',
+        r'grn\s*(?:no|number)[:\s]*([A-Z0-9\-\/\.]+)',
+        # Pattern for standalone alphanumeric codes (common in ESIC)
+        r'(?:^|\n)\s*([A-Z]{2,}\d{6,}|\d{10,}[A-Z]+|\d{12,})\s*(?:\n|$)',
+        # Pattern for transaction IDs in tables or structured format
+        r'(?:transaction|txn|ref|reference)[\s\|]*([A-Z0-9]{8,})',
+        # Additional loose patterns
+        r'([A-Z0-9]{10,20})',  # Any alphanumeric string 10-20 chars
+    )
+}
+
+# Each compiled pattern is paired with the literal word it starts with (None for the
+# generic ones). A pattern whose word is absent from the lowercased text cannot match,
+# so the text is checked with a plain substring test before the regex scans it.
+_RE_PATTERN_KEYWORD = re.compile(r'[a-z]+')
+
+def _keyed_pattern(pattern):
+    keyword = _RE_PATTERN_KEYWORD.match(pattern)
+    return (keyword.group() if keyword else None, re.compile(pattern, re.IGNORECASE))
+
+_RE_CHALLAN_FIELDS = {
+    field: tuple(_keyed_pattern(pattern) for pattern in pattern_list)
+    for field, pattern_list in CHALLAN_FIELD_PATTERNS.items()
+}
+_RE_TXN_CANDIDATE = re.compile(r'[A-Z0-9]{8,20}', re.IGNORECASE)
+# Last-resort codes; the lookahead skips digit-free words, which can never be valid numbers
+_RE_TXN_CODE = re.compile(r'\b(?=[A-Z]*\d)[A-Z0-9]{10,20}\b', re.IGNORECASE)
+# Words marking a line that may carry the transaction number
+TXN_INDICATOR_WORDS = (
+    'transaction', 'txn', 'reference', 'ref', 'utr', 'acknowledgment',
+    'ack', 'receipt', 'grn', 'bank', 'payment'
+)
+# Words that mark a transaction number candidate as ordinary challan text
+TXN_FALSE_POSITIVE_WORDS = (
+    'esic', 'challan', 'employer', 'employee', 'amount', 'total',
+    'period', 'month', 'year', 'date', 'time', 'status', 'paid'
+)
+_RE_LETTER = re.compile(r'[^\W\d_]')
+_RE_DIGIT = re.compile(r'\d')
+_RE_TABLE_LINE = re.compile(r'\s+\d+\.\d{2}\s+|\s+₹\s*\d+')
+_RE_TABLE_CELL_SPLIT = re.compile(r'\s{2,}')
+# Number of distinct PDFs whose challan results an extractor keeps
+CHALLAN_RESULT_CACHE_SIZE = 256
+# Length of the raw text preview kept with each challan result
+CHALLAN_RAW_TEXT_PREVIEW = 1000
+
+def is_challan_table_line(line):
+    """Check if a line looks like a table row (has multiple columns separated by spaces/tabs)"""
+    # maxsplit stops splitting once the third column is found
+    return bool(_RE_TABLE_LINE.search(line)) and len(line.split(None, 2)) >= 3
+
+
+class ChallanPageScan:
+    """Follows challan pages as they are extracted to tell when the rest can be skipped
+
+    Challans carry all their fields and the contribution table on the first page or two,
+    so reading stops once the remaining pages can no longer change any extracted field, a
+    table row has been seen and the raw text preview is full. Long documents then cost a
+    page or two instead of a full parse.
+
+    extract_field_patterns takes the first pattern of each field's ladder that matches
+    anywhere in the text, so a field is only settled by the pattern it would pick on the
+    whole document: the top one (the transaction number may step past patterns whose first
+    match fails validation). A match only counts once it starts before the last few lines,
+    since a label there can still run on into the next page.
+    """
+    def __init__(self, is_valid_transaction_number):
+        self.is_valid_transaction_number = is_valid_transaction_number
+        # Ladder position of each field still open; the loose last-resort transaction
+        # pattern is left out, as the extractor only reaches it after a whole-text search
+        self.pending_fields = dict.fromkeys(_RE_CHALLAN_FIELDS, 0)
+        self.ladders = dict(_RE_CHALLAN_FIELDS)
+        self.ladders['transaction_number'] = self.ladders['transaction_number'][:-1]
+        # Settled first match of each (field, ladder position), stripped
+        self.first_matches = {}
+        self.seen_keywords = set()
+        # Text from the first line a match could still start on; earlier text is settled
+        self.tail = ''
+        self.table_found = False
+        self.text_length = 0
+    
+    def add_page(self, page_text):
+        """Record one page's text and return True when no further pages are needed"""
+        self.text_length += len(page_text)
+        window = self.tail + page_text
+        window_lower = window.lower()
+        # Case-insensitive matching lets a few non-ASCII letters stand in for a keyword
+        # (the long s, the Kelvin sign), so only skip searches on plain ASCII text
+        window_ascii = window.isascii()
+        settled_end = challan_settled_end(window)
+        
+        for field, position in list(self.pending_fields.items()):
+            ladder = self.ladders[field]
+            for index in range(position, len(ladder)):
+                keyword, pattern = ladder[index]
+                keyword_here = keyword is None or keyword in window_lower
+                if keyword and keyword_here:
+                    self.seen_keywords.add(keyword)
+                if (field, index) not in self.first_matches and (keyword_here or not window_ascii):
+                    match = pattern.search(window)
+                    if match and match.start() < settled_end:
+                        self.first_matches[field, index] = match.group(1).strip()
+            self._advance(field)
+        
+        self.tail = window[settled_end:]
+        
+        if not self.table_found:
+            self.table_found = any(is_challan_table_line(line) for line in page_text.splitlines())
+        
+        return not self.pending_fields and self.table_found and self.text_length > CHALLAN_RAW_TEXT_PREVIEW
+    
+    def _advance(self, field):
+        """Walk a field's ladder over patterns whose outcome is settled"""
+        ladder = self.ladders[field]
+        index = self.pending_fields[field]
+        while index < len(ladder):
+            value = self.first_matches.get((field, index))
+            if value is None:
+                break
+            keyword = ladder[index][0]
+            valid = field != 'transaction_number' or self.is_valid_transaction_number(value)
+            if valid:
+                # Used as long as its keyword turns up somewhere in the text
+                if keyword is None or keyword in self.seen_keywords:
+                    del self.pending_fields[field]
+                    return
+                break
+            # An invalid first match sends the extractor to the next pattern either way
+            index += 1
+        self.pending_fields[field] = index
+
+
+# A challan pattern matching across lines only crosses whitespace, ':', '|' and "'s"
+# between its words, and no label has more than this many runs of other characters
+CHALLAN_LABEL_MAX_RUNS = 3
+_RE_SOLID_CHAR = re.compile(r"[^\s:|'s]", re.IGNORECASE)
+
+def challan_settled_end(text):
+    """Start of the trailing lines of text where a challan field match may still be cut off
+
+    A match attempt can only read on past the end of text if it starts within the last
+    CHALLAN_LABEL_MAX_RUNS lines that hold anything besides the characters it may cross.
+    Matches starting before that point are the same whatever text follows.
+    """
+    end = len(text)
+    solid_lines = 0
+    while end > 0:
+        line_start = text.rfind('\n', 0, end - 1) + 1
+        if _RE_SOLID_CHAR.search(text, line_start, end):
+            solid_lines += 1
+            if solid_lines == CHALLAN_LABEL_MAX_RUNS:
+                return line_start
+        end = line_start
+    return 0
+
+
 class ESICChallanExtractor:
     def __init__(self):
         self.required_keywords = [
             'esic', 'challan', 'employer', 'transaction', 'amount'
         ]
+        # Results of already processed PDFs keyed by pdf_digest(), least recently used first
+        self._result_cache = OrderedDict()
         
     def extract_text_pdfplumber(self, pdf_bytes):
-        """Extract text using pdfplumber"""
+        """Extract text using pdfplumber, stopping once ChallanPageScan has seen everything it needs"""
         try:
-            with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
-                text = ""
+            page_scan = ChallanPageScan(self._is_valid_transaction_number)
+            with optional_module("pdfplumber").open(io.BytesIO(pdf_bytes)) as pdf:
+                page_texts = []
                 for page in pdf.pages:
                     page_text = page.extract_text()
                     if page_text:
-                        text += page_text + "\n"
-                return text
+                        page_texts.append(page_text + "\n")
+                        if page_scan.add_page(page_texts[-1]):
+                            break
+                return "".join(page_texts)
         except Exception as e:
             logger.error(f"Error extracting text with pdfplumber: {str(e)}")
             return None
     
     def extract_text_pymupdf(self, pdf_bytes):
-        """Extract text using PyMuPDF"""
+        """Extract text using PyMuPDF, with lines rebuilt the way pdfplumber reports them
+
+        Like extract_text_pdfplumber, stops once ChallanPageScan has seen everything it needs.
+        """
         try:
-            doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-            text = ""
-            for page_num in range(doc.page_count):
-                page = doc[page_num]
-                text += page.get_text() + "\n"
-            doc.close()
-            return text
+            page_scan = ChallanPageScan(self._is_valid_transaction_number)
+            with optional_module("fitz").open(stream=pdf_bytes, filetype="pdf") as doc:
+                page_texts = []
+                for page in doc:
+                    page_text = extract_page_text_pymupdf(page)
+                    if page_text:
+                        page_texts.append(page_text + "\n")
+                        if page_scan.add_page(page_texts[-1]):
+                            break
+            return "".join(page_texts)
         except Exception as e:
             logger.error(f"Error extracting text with PyMuPDF: {str(e)}")
             return None
     
     def extract_text_from_pdf(self, pdf_bytes):
-        """Extract text using available PDF library"""
+        """Extract text using available PDF library, preferring PyMuPDF for speed"""
         text = None
         
-        if PDFPLUMBER_AVAILABLE:
-            text = self.extract_text_pdfplumber(pdf_bytes)
-        
-        if text is None and PYMUPDF_AVAILABLE:
+        if PYMUPDF_AVAILABLE:
             text = self.extract_text_pymupdf(pdf_bytes)
         
+        if text is None and PDFPLUMBER_AVAILABLE:
+            text = self.extract_text_pdfplumber(pdf_bytes)
+        
         return text
     
     def check_esic_keywords(self, text):
@@ -662,88 +1007,35 @@ class ESICChallanExtractor:
             return False
         
         text_lower = text.lower()
-        found_keywords = sum(1 for keyword in self.required_keywords 
-                           if keyword in text_lower)
+        found_keywords = 0
         
-        # Require at least 3 out of 5 keywords to be present
-        return found_keywords >= 3
+        # Require at least 3 out of 5 keywords to be present; stop as soon as they are
+        for keyword in self.required_keywords:
+            if keyword in text_lower:
+                found_keywords += 1
+                if found_keywords >= 3:
+                    return True
+        
+        return False
     
     def extract_field_patterns(self, text):
         """Extract specific fields using regex patterns"""
-        patterns = {
-            'transaction_status': [
-                r'status[:\s]*([^\n\r]+)',
-                r'transaction\s*status[:\s]*([^\n\r]+)',
-                r'payment\s*status[:\s]*([^\n\r]+)'
-            ],
-            'employer_code': [
-                r'employer[\'s\s]*code[:\s]*(\d+)',
-                r'code\s*no[:\s]*(\d+)',
-                r'employer\s*no[:\s]*(\d+)'
-            ],
-            'employer_name': [
-                r'employer[\'s\s]*name[:\s]*([^\n\r]+)',
-                r'name\s*of\s*employer[:\s]*([^\n\r]+)',
-                r'establishment[:\s]*([^\n\r]+)'
-            ],
-            'challan_period': [
-                r'challan\s*period[:\s]*([^\n\r]+)',
-                r'period[:\s]*([^\n\r]+)',
-                r'contribution\s*period[:\s]*([^\n\r]+)'
-            ],
-            'challan_number': [
-                r'challan\s*no[:\s]*([A-Z0-9\-\/]+)',
-                r'challan\s*number[:\s]*([A-Z0-9\-\/]+)',
-                r'receipt\s*no[:\s]*([A-Z0-9\-\/]+)'
-            ],
-            'challan_created_date': [
-                r'created\s*date[:\s]*(\d{1,2}[-\/]\d{1,2}[-\/]\d{4})',
-                r'generation\s*date[:\s]*(\d{1,2}[-\/]\d{1,2}[-\/]\d{4})',
-                r'date\s*of\s*creation[:\s]*(\d{1,2}[-\/]\d{1,2}[-\/]\d{4})'
-            ],
-            'challan_submitted_date': [
-                r'submitted\s*date[:\s]*(\d{1,2}[-\/]\d{1,2}[-\/]\d{4})',
-                r'payment\s*date[:\s]*(\d{1,2}[-\/]\d{1,2}[-\/]\d{4})',
-                r'transaction\s*date[:\s]*(\d{1,2}[-\/]\d{1,2}[-\/]\d{4})'
-            ],
-            'amount_paid': [
-                r'amount\s*paid[:\s]*₹?\s*([0-9,]+\.?\d*)',
-                r'total\s*amount[:\s]*₹?\s*([0-9,]+\.?\d*)',
-                r'paid\s*amount[:\s]*₹?\s*([0-9,]+\.?\d*)'
-            ],
-            'transaction_number': [
-                # Enhanced patterns for transaction numbers
-                r'transaction\s*(?:no|number|id)[:\s]*([A-Z0-9\-\/\.]+)',
-                r'txn\s*(?:no|number|id)[:\s]*([A-Z0-9\-\/\.]+)',
-                r'reference\s*(?:no|number|id)[:\s]*([A-Z0-9\-\/\.]+)',
-                r'utr\s*(?:no|number)[:\s]*([A-Z0-9\-\/\.]+)',
-                r'bank\s*reference\s*(?:no|number)[:\s]*([A-Z0-9\-\/\.]+)',
-                r'payment\s*reference\s*(?:no|number)[:\s]*([A-Z0-9\-\/\.]+)',
-                r'ref\s*(?:no|number)[:\s]*([A-Z0-9\-\/\.]+)',
-                r'acknowledgment\s*(?:no|number)[:\s]*([A-Z0-9\-\/\.]+)',
-                r'ack\s*(?:no|number)[:\s]*([A-Z0-9\-\/\.]+)',
-                r'receipt\s*(?:no|number)[:\s]*([A-Z0-9\-\/\.]+)',
-                r'grn\s*(?:no|number)[:\s]*([A-Z0-9\-\/\.]+)',
-                # Pattern for standalone alphanumeric codes (common in ESIC)
-                r'(?:^|\n)\s*([A-Z]{2,}\d{6,}|\d{10,}[A-Z]+|\d{12,})\s*(?:\n|$)',
-                # Pattern for transaction IDs in tables or structured format
-                r'(?:transaction|txn|ref|reference)[\s\|]*([A-Z0-9]{8,})',
-                # Additional loose patterns
-                r'([A-Z0-9]{10,20})',  # Any alphanumeric string 10-20 chars
-            ]
-        }
-        
         extracted_data = {}
+        text_lower = text.lower()
+        # A missing keyword only rules a pattern out on plain ASCII text, as in ChallanPageScan
+        text_ascii = text.isascii()
         
-        for field, pattern_list in patterns.items():
+        for field, pattern_list in _RE_CHALLAN_FIELDS.items():
             value = None
             
             # Special handling for transaction_number with multiple attempts
             if field == 'transaction_number':
-                value = self._extract_transaction_number(text, pattern_list)
+                value = self._extract_transaction_number(text, text_lower, text_ascii, pattern_list)
             else:
-                for pattern in pattern_list:
-                    match = re.search(pattern, text, re.IGNORECASE)
+                for keyword, pattern in pattern_list:
+                    if keyword and text_ascii and keyword not in text_lower:
+                        continue
+                    match = pattern.search(text)
                     if match:
                         value = match.group(1).strip()
                         break
@@ -752,38 +1044,36 @@ class ESICChallanExtractor:
         
         return extracted_data
     
-    def _extract_transaction_number(self, text, pattern_list):
+    def _extract_transaction_number(self, text, text_lower, text_ascii, pattern_list):
         """Special method to extract transaction number with enhanced logic"""
         # First try the specific patterns
-        for pattern in pattern_list[:-1]:  # Exclude the very loose pattern initially
-            match = re.search(pattern, text, re.IGNORECASE)
+        for keyword, pattern in pattern_list[:-1]:  # Exclude the very loose pattern initially
+            if keyword and text_ascii and keyword not in text_lower:
+                continue
+            match = pattern.search(text)
             if match:
                 candidate = match.group(1).strip()
                 # Validate the candidate
                 if self._is_valid_transaction_number(candidate):
                     return candidate
         
-        # If no match found, try to find transaction numbers in common formats
-        transaction_indicators = [
-            'transaction', 'txn', 'reference', 'ref', 'utr', 'acknowledgment', 
-            'ack', 'receipt', 'grn', 'bank', 'payment'
-        ]
+        # If no match found, try to find transaction numbers in common formats;
+        # only indicators present somewhere in the text can mark a line
+        indicators = [indicator for indicator in TXN_INDICATOR_WORDS if indicator in text_lower]
         
         # Look for lines containing transaction indicators
-        lines = text.split('\n')
-        for line in lines:
-            line_lower = line.lower()
-            for indicator in transaction_indicators:
-                if indicator in line_lower:
+        if indicators:
+            for line, line_lower in zip(text.split('\n'), text_lower.split('\n')):
+                if any(indicator in line_lower for indicator in indicators):
                     # Extract potential transaction numbers from this line
-                    potential_numbers = re.findall(r'[A-Z0-9]{8,20}', line, re.IGNORECASE)
+                    potential_numbers = _RE_TXN_CANDIDATE.findall(line)
                     for num in potential_numbers:
                         if self._is_valid_transaction_number(num):
                             return num
         
-        # Last resort: look for any long alphanumeric strings
-        all_codes = re.findall(r'\b[A-Z0-9]{10,20}\b', text, re.IGNORECASE)
-        for code in all_codes:
+        # Last resort: look for any long alphanumeric strings, stopping at the first valid one
+        for match in _RE_TXN_CODE.finditer(text):
+            code = match.group()
             if self._is_valid_transaction_number(code):
                 return code
         
@@ -795,17 +1085,14 @@ class ESICChallanExtractor:
             return False
         
         # Remove common false positives
-        false_positives = [
-            'esic', 'challan', 'employer', 'employee', 'amount', 'total',
-            'period', 'month', 'year', 'date', 'time', 'status', 'paid'
-        ]
-        
-        if any(fp in candidate.lower() for fp in false_positives):
-            return False
+        candidate_lower = candidate.lower()
+        for word in TXN_FALSE_POSITIVE_WORDS:
+            if word in candidate_lower:
+                return False
         
         # Check if it has a good mix of letters and numbers (typical for transaction IDs)
-        has_letters = any(c.isalpha() for c in candidate)
-        has_numbers = any(c.isdigit() for c in candidate)
+        has_letters = _RE_LETTER.search(candidate) is not None
+        has_numbers = _RE_DIGIT.search(candidate) is not None
         
         # Should have both letters and numbers, or be all numbers with good length
         if has_letters and has_numbers:
@@ -820,19 +1107,17 @@ class ESICChallanExtractor:
         tables = []
         
         # Look for table-like structures
-        lines = text.split('\n')
         potential_table_lines = []
         
-        for line in lines:
-            # Check if line looks like a table row (has multiple columns separated by spaces/tabs)
-            if re.search(r'\s+\d+\.\d{2}\s+|\s+₹\s*\d+', line) and len(line.split()) >= 3:
+        for line in text.splitlines():
+            if is_challan_table_line(line):
                 potential_table_lines.append(line)
         
         if potential_table_lines:
             # Try to parse as table
             table_data = []
             for line in potential_table_lines:
-                row = [cell.strip() for cell in re.split(r'\s{2,}', line) if cell.strip()]
+                row = [cell.strip() for cell in _RE_TABLE_CELL_SPLIT.split(line) if cell.strip()]
                 if row:
                     table_data.append(row)
             tables.append(table_data)
@@ -840,10 +1125,38 @@ class ESICChallanExtractor:
         return tables
     
     def process_single_pdf(self, pdf_bytes, filename):
-        """Process a single PDF file and extract ESIC challan data"""
+        """Process a single PDF file and extract ESIC challan data, reusing results for identical files"""
+        cache_key = pdf_digest(pdf_bytes)
+        result = self._cached_result(cache_key)
+        if result is None:
+            result = self._process_pdf(pdf_bytes, filename)
+            self._remember_result(cache_key, result)
+        return {**result, 'filename': filename}
+    
+    def _cached_result(self, cache_key):
+        """Return the stored result for a PDF digest, or None"""
+        # pop and re-insert marks the entry recently used without racing other sessions
+        result = self._result_cache.pop(cache_key, None)
+        if result is not None:
+            self._result_cache[cache_key] = result
+        return result
+    
+    def _remember_result(self, cache_key, result):
+        """Store a result, evicting the least recently used beyond CHALLAN_RESULT_CACHE_SIZE"""
+        # Errors may come from the environment rather than the file, so retry those
+        if result['status'] == 'error':
+            return
+        self._result_cache[cache_key] = result
+        while len(self._result_cache) > CHALLAN_RESULT_CACHE_SIZE:
+            self._result_cache.popitem(last=False)
+    
+    def _process_pdf(self, pdf_bytes, filename):
+        """Extract ESIC challan data from PDF bytes without consulting the cache"""
         try:
             # Extract text
             text = self.extract_text_from_pdf(pdf_bytes)
+            # The PDF itself is not needed past this point; drop this frame's reference to it
+            del pdf_bytes
             if not text:
                 return {
                     'filename': filename,
@@ -870,119 +1183,165 @@ class ESICChallanExtractor:
                 'status': 'success',
                 'extracted_data': extracted_fields,
                 'tables': tables,
-                'raw_text': text[:1000] + "..." if len(text) > 1000 else text  # First 1000 chars
+                'raw_text': text[:CHALLAN_RAW_TEXT_PREVIEW] + "..." if len(text) > CHALLAN_RAW_TEXT_PREVIEW else text
             }
             
             return result
             
         except Exception as e:
-            logger.error(f"Error processing {filename}: {str(e)}")
-            logger.error(traceback.format_exc())
+            logger.exception(f"Error processing {filename}: {str(e)}")
             return {
                 'filename': filename,
                 'status': 'error',
                 'error': str(e)
             }
+    
+    def process_pdfs_batch(self, files):
+        """Yield process_single_pdf results for (pdf_bytes, filename) pairs in order, spread over CPU cores"""
+        # Only PDFs not seen before go to the workers, each distinct file once; the
+        # bytes of cached and duplicate files are not held on to
+        order = []
+        known = {}
+        pending = {}
+        for pdf_bytes, filename in files:
+            cache_key = pdf_digest(pdf_bytes)
+            order.append((filename, cache_key))
+            result = self._cached_result(cache_key)
+            if result is not None:
+                known[cache_key] = result
+            elif cache_key not in pending:
+                pending[cache_key] = (pdf_bytes, filename)
+        
+        new_results = map_in_processes(process_challan_pdf, pending.values(), item_size=lambda item: len(item[0]))
+        for filename, cache_key in order:
+            if cache_key not in known:
+                known[cache_key] = next(new_results)
+                self._remember_result(cache_key, known[cache_key])
+            yield {**known[cache_key], 'filename': filename}
 
 
-def create_challan_excel_report(results):
-    """Create Excel report from challan extraction results"""
-    # Prepare data for DataFrame
-    report_data = []
-    
-    for result in results:
-        if result['status'] == 'success':
-            extracted = result['extracted_data']
-            row = {
-                'Filename': result['filename'],
-                'Status': result['status'],
-                'Transaction Status': extracted.get('transaction_status', 'Not Found'),
-                'Employer Code': extracted.get('employer_code', 'Not Found'),
-                'Employer Name': extracted.get('employer_name', 'Not Found'),
-                'Challan Period': extracted.get('challan_period', 'Not Found'),
-                'Challan Number': extracted.get('challan_number', 'Not Found'),
-                'Challan Created Date': extracted.get('challan_created_date', 'Not Found'),
-                'Challan Submitted Date': extracted.get('challan_submitted_date', 'Not Found'),
-                'Amount Paid': safe_numeric_convert_challan(extracted.get('amount_paid', 'Not Found')),
-                'Transaction Number': extracted.get('transaction_number', 'Not Found'),
-                'Tables Found': len(result.get('tables', [])),
-                'Error': ''
-            }
-        else:
-            row = {
-                'Filename': result['filename'],
-                'Status': result['status'],
-                'Transaction Status': 'Error',
-                'Employer Code': 'Error',
-                'Employer Name': 'Error',
-                'Challan Period': 'Error',
-                'Challan Number': 'Error',
-                'Challan Created Date': 'Error',
-                'Challan Submitted Date': 'Error',
-                'Amount Paid': 'Error',
-                'Transaction Number': 'Error',
-                'Tables Found': 0,
-                'Error': result.get('error', 'Unknown error')
-            }
-        
-        report_data.append(row)
+@st.cache_resource
+def get_challan_extractor():
+    """Challan extractor shared across reruns and sessions, so its result cache outlives a run"""
+    return ESICChallanExtractor()
+
+def process_challan_pdf(file):
+    """Process one (pdf_bytes, filename) pair; module level so worker processes can run it"""
+    pdf_bytes, filename = file
+    return ESICChallanExtractor()._process_pdf(pdf_bytes, filename)
+
+
+# Columns of the challan report, in order
+CHALLAN_REPORT_COLUMNS = (
+    'Filename', 'Status', 'Transaction Status', 'Employer Code', 'Employer Name', 'Challan Period',
+    'Challan Number', 'Challan Created Date', 'Challan Submitted Date', 'Amount Paid',
+    'Transaction Number', 'Tables Found', 'Error'
+)
+
+def challan_report_row(result):
+    """Return the report row for one processing result, in CHALLAN_REPORT_COLUMNS order"""
+    if result['status'] == 'success':
+        extracted = result['extracted_data']
+        return (
+            result['filename'],
+            result['status'],
+            extracted.get('transaction_status', 'Not Found'),
+            extracted.get('employer_code', 'Not Found'),
+            extracted.get('employer_name', 'Not Found'),
+            extracted.get('challan_period', 'Not Found'),
+            extracted.get('challan_number', 'Not Found'),
+            extracted.get('challan_created_date', 'Not Found'),
+            extracted.get('challan_submitted_date', 'Not Found'),
+            safe_numeric_convert_challan(extracted.get('amount_paid', 'Not Found')),
+            extracted.get('transaction_number', 'Not Found'),
+            len(result.get('tables', [])),
+            ''
+        )
     
-    # Create DataFrame
-    df = pd.DataFrame(report_data)
+    return (
+        result['filename'],
+        result['status'],
+        'Error', 'Error', 'Error', 'Error', 'Error', 'Error', 'Error', 'Error', 'Error',
+        0,
+        result.get('error', 'Unknown error')
+    )
+
+# Columns of the detailed results table in the challan tab, in order
+CHALLAN_DETAIL_COLUMNS = (
+    'Status', 'Filename', 'Transaction Status', 'Transaction Number', 'Amount Paid',
+    'Employer Code', 'Challan Period', 'Tables Found', 'Error'
+)
+
+# Status column icons; anything else (not_esic) gets a warning sign
+CHALLAN_STATUS_ICONS = {'success': "✅", 'error': "❌"}
+
+def challan_detail_row(result):
+    """Return the detailed results row for one processing result, in CHALLAN_DETAIL_COLUMNS order"""
+    status_icon = CHALLAN_STATUS_ICONS.get(result['status'], "⚠️")
+    if result['status'] == 'success':
+        data = result['extracted_data']
+        return (
+            status_icon,
+            result['filename'],
+            data.get('transaction_status', 'N/A'),
+            data.get('transaction_number', 'N/A'),
+            data.get('amount_paid', 'N/A'),
+            data.get('employer_code', 'N/A'),
+            data.get('challan_period', 'N/A'),
+            len(result.get('tables', [])),
+            ''
+        )
     
+    return (status_icon, result['filename'], '', '', '', '', '', 0, result.get('error', 'Unknown error'))
+
+def create_challan_excel_report(results):
+    """Create Excel report from challan extraction results"""
     # Create Excel file
     output = BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        df.to_excel(writer, sheet_name='ESIC_Challan_Report', index=False)
-        
-        # Get workbook and worksheet
-        workbook = writer.book
-        worksheet = writer.sheets['ESIC_Challan_Report']
-        
-        # Format headers
-        header_format = workbook.add_format({
-            'bold': True,
-            'text_wrap': True,
-            'valign': 'top',
-            'fg_color': '#D7E4BD',
-            'border': 1
-        })
-        
-        # Format data cells
-        cell_format = workbook.add_format({
-            'text_wrap': True,
-            'valign': 'top',
-            'border': 1
-        })
-        
-        # Error cell format
-        error_format = workbook.add_format({
-            'text_wrap': True,
-            'valign': 'top',
-            'border': 1,
-            'fg_color': '#FFC7CE'
-        })
-        
-        # Apply formatting
-        for col_num, value in enumerate(df.columns.values):
-            worksheet.write(0, col_num, value, header_format)
-        
-        # Format data rows
-        for row_num in range(1, len(df) + 1):
-            for col_num, value in enumerate(df.iloc[row_num - 1]):
-                if df.columns[col_num] == 'Status' and value in ['error', 'not_esic']:
-                    worksheet.write(row_num, col_num, value, error_format)
-                else:
-                    worksheet.write(row_num, col_num, value, cell_format)
-        
-        # Auto-adjust column widths
-        for i, column in enumerate(df.columns):
-            max_length = max(
-                df[column].astype(str).map(len).max(),
-                len(column)
-            )
-            worksheet.set_column(i, i, min(max_length + 2, 50))
-    
+    # constant_memory streams each row out as it is written instead of keeping the sheet in memory
+    workbook = optional_module("xlsxwriter").Workbook(output, {'constant_memory': True, 'strings_to_formulas': False, 'strings_to_urls': False})
+    worksheet = workbook.add_worksheet('ESIC_Challan_Report')
+    
+    # Format headers
+    header_format = workbook.add_format({
+        'bold': True,
+        'text_wrap': True,
+        'valign': 'top',
+        'fg_color': '#D7E4BD',
+        'border': 1
+    })
+    
+    # Format data cells
+    cell_format = workbook.add_format({
+        'text_wrap': True,
+        'valign': 'top',
+        'border': 1
+    })
+    
+    # Error cell format
+    error_format = workbook.add_format({
+        'text_wrap': True,
+        'valign': 'top',
+        'border': 1,
+        'fg_color': '#FFC7CE'
+    })
+    
+    # Write headers and data rows straight from the results, one call per row,
+    # tracking column widths on the way
+    widths = {}
+    write_excel_row(worksheet, 0, CHALLAN_REPORT_COLUMNS, header_format, widths)
+    status_col = CHALLAN_REPORT_COLUMNS.index('Status')
+    for row_num, result in enumerate(results, 1):
+        row = challan_report_row(result)
+        write_excel_row(worksheet, row_num, row, cell_format, widths)
+        # Highlight failed files; rewriting a cell of the current row is fine in constant_memory mode
+        if row[status_col] in ['error', 'not_esic']:
+            worksheet.write(row_num, status_col, row[status_col], error_format)
+    
+    # Auto-adjust column widths
+    fit_column_widths(worksheet, widths)
+    
+    workbook.close()
     output.seek(0)
     return output
 
@@ -1002,24 +1361,333 @@ def create_enhanced_upload_section(title, description, key, file_type="pdf"):
         label_visibility="collapsed"
     )
 
+# Upper bound on progress bar redraws per batch; each redraw is a round trip to the browser
+PROGRESS_UPDATES = 20
+
+def progress_update_due(index, total):
+    """Whether the progress display should be redrawn for the file at index"""
+    update_every = max(1, total // PROGRESS_UPDATES)
+    return index % update_every == 0 or index == total - 1
+
+def shorten_text(text, limit):
+    """Cut text to limit characters, marking the cut with an ellipsis"""
+    return text[:limit] + "..." if len(text) > limit else text
+
+def render_metric_row(metrics):
+    """Render (label, value, delta, tone) tuples as a single row of stats cards
+
+    tone colours the delta: 'good', 'warning', or None for neutral.
+    """
+    # One HTML element for the whole row instead of a column and a metric widget per value
+    cards = []
+    for label, value, delta, tone in metrics:
+        delta_class = f"stats-delta {tone}" if tone else "stats-delta"
+        delta_html = f'<div class="{delta_class}">{html.escape(str(delta))}</div>' if delta is not None else ''
+        cards.append(
+            f'<div class="stats-card"><div class="stats-label">{html.escape(label)}</div>'
+            f'<div class="stats-value">{html.escape(str(value))}</div>{delta_html}</div>'
+        )
+    st.markdown(f'<div class="stats-row">{"".join(cards)}</div>', unsafe_allow_html=True)
+
+def require_library(available, message, install_cmd):
+    """Show an install hint when a required library is missing; returns True if available"""
+    if not available:
+        st.error(message)
+        st.code(install_cmd)
+    return available
+
 # ============================================================================
-# STREAMLIT APPLICATION
+# TAB 1: CONTRIBUTION HISTORY EXTRACTOR
 # ============================================================================
 
-def main():
-    st.set_page_config(
-        page_title="ESIC PDF Data Extractor",
-        page_icon="📄",
-        layout="wide",
-        initial_sidebar_state="collapsed"
+@st.fragment
+def render_ecr_tab():
+    """Render the ECR (contribution history) extractor tab"""
+    if not require_library(PYMUPDF_AVAILABLE or PDFPLUMBER_AVAILABLE,
+                           "❌ PyMuPDF or pdfplumber is required for contribution history extraction. Please install one first.",
+                           "pip install PyMuPDF"):
+        return
+    
+    uploaded_files = create_enhanced_upload_section(
+        "ESIC ECR File Upload", 
+        "Upload ESIC ECR PDF files to extract employee contribution data including month information.",
+        "contribution_files"
     )
     
-    # Enhanced Custom CSS for professional appearance
-    st.markdown("""
-    <style>
-    /* Import Google Fonts */
-    @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap');
+    if uploaded_files:
+        st.info(f"📁 Selected {len(uploaded_files)} file(s) for processing")
+        
+        if st.button("🔄 Process ECR PDFs", type="primary", key="process_contribution"):
+            # Create containers for different sections
+            progress_container = st.container()
+            results_container = st.container()
+            download_container = st.container()
+            
+            with progress_container:
+                st.subheader("🔄 Processing Status")
+                progress_bar = st.progress(0)
+                status_text = st.empty()
+                
+                # Processing results tracking
+                all_data = []
+                successful_files = []
+                failed_files = []
+                
+                # Process files in parallel; raw bytes keep the work items picklable
+                pdf_contents = [uploaded_file.getvalue() for uploaded_file in uploaded_files]
+                extracted_results = extract_esic_data_batch(pdf_contents)
+                
+                for i, uploaded_file in enumerate(uploaded_files):
+                    show_progress = progress_update_due(i, len(uploaded_files))
+                    if show_progress:
+                        status_text.text(f"Processing: {uploaded_file.name}")
+                    
+                    try:
+                        extracted_data, errors = next(extracted_results)
+                        if extracted_data:
+                            # Rows that could not be parsed are reported as they were skipped
+                            for message in errors:
+                                st.error(message)
+                            all_data.append({
+                                'filename': uploaded_file.name,
+                                'data': extracted_data
+                            })
+                            successful_files.append(uploaded_file.name)
+                        elif errors:
+                            failed_files.append(f"{uploaded_file.name} ({errors[-1]})")
+                        else:
+                            failed_files.append(uploaded_file.name)
+                    
+                    except Exception as e:
+                        failed_files.append(f"{uploaded_file.name} (Error: {str(e)})")
+                    
+                    if show_progress:
+                        progress_bar.progress((i + 1) / len(uploaded_files))
+                
+                status_text.empty()
+                progress_bar.empty()
+            
+            # Show results summary
+            with results_container:
+                if all_data or failed_files:
+                    st.subheader("📊 Processing Summary")
+                    
+                    # Summary metrics
+                    total_employees = sum(len(data['data'].get('employee_data', [])) for data in all_data)
+                    total_files = len(uploaded_files)
+                    successful_count = len(successful_files)
+                    failed_count = len(failed_files)
+                    
+                    render_metric_row([
+                        ("📄 Total Files", total_files, None, None),
+                        ("✅ Successful", successful_count, f"{(successful_count/total_files*100):.1f}%",
+                         'good' if successful_count else None),
+                        ("❌ Failed", failed_count, f"{(failed_count/total_files*100):.1f}%" if failed_count > 0 else "0%",
+                         'warning' if failed_count else None),
+                        ("👥 Total Employees", total_employees, None, None),
+                    ])
+                    
+                    # Success/failure indicator
+                    if successful_count == total_files:
+                        st.success(f"🎉 All {total_files} files processed successfully!")
+                    elif successful_count > 0:
+                        st.warning(f"⚠️ {successful_count} files processed successfully, {failed_count} failed")
+                    else:
+                        st.error("❌ No files were processed successfully")
+            
+            # Download section and preview
+            with download_container:
+                if all_data:
+                    st.subheader("📥 Download & Preview")
+                    
+                    col1, col2 = st.columns([2, 1])
+                    
+                    with col1:
+                        # The workbook is only built when the button is clicked, outside this script
+                        # run; if that fails Streamlit logs it and reports the failed download itself
+                        st.download_button(
+                            label="📥 Download Excel Report",
+                            data=functools.partial(create_combined_excel, all_data),
+                            file_name=f"ESIC_ECR_Report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
+                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                            type="primary"
+                        )
+                    
+                    with col2:
+                        st.info(f"💡 Excel contains:\n• Combined data sheet with month info\n• Individual file sheets\n• {total_employees} employee records")
+                    
+                    # Data preview
+                    if all_data[0]['data'].get('employee_data'):
+                        st.subheader("📋 Data Preview (First 10 rows)")
+                        preview_rows = all_data[0]['data']['employee_data'][:10]
+                        # Show only key columns for preview including month
+                        key_columns = ['Month', 'SNo.', 'IP Number', 'IP Name', 'No. Of Days', 'Total Wages', 'IP Contribution']
+                        # Build column-wise so pandas only sees the columns we display
+                        preview_df = pd.DataFrame({col: [row[ECR_COLUMN_INDEX[col]] for row in preview_rows] for col in key_columns})
+                        st.dataframe(preview_df, use_container_width=True)
+                
+                # Show processing details in collapsible section
+                if successful_files or failed_files:
+                    with st.expander("📝 View Processing Details", expanded=False):
+                        # Each list goes out as one markdown element rather than a write per file
+                        if successful_files:
+                            st.success("✅ Successfully Processed Files:")
+                            # Index the data by filename once; the first upload wins for repeated names
+                            data_by_name = {}
+                            for item in all_data:
+                                data_by_name.setdefault(item['filename'], item)
+                            lines = []
+                            for filename in successful_files:
+                                # Show extracted month if available
+                                file_data = data_by_name.get(filename)
+                                if file_data and 'header_info' in file_data['data']:
+                                    month = file_data['data']['header_info'].get('month', 'Unknown')
+                                    lines.append(f"- {filename} (Month: {month})")
+                                else:
+                                    lines.append(f"- {filename}")
+                            st.markdown("\n".join(lines))
+                        
+                        if failed_files:
+                            st.error("❌ Failed Files:")
+                            st.markdown("\n".join(f"- {filename}" for filename in failed_files))
+
+
+# ============================================================================
+# TAB 2: CHALLAN EXTRACTOR
+# ============================================================================
+
+@st.fragment
+def render_challan_tab():
+    """Render the challan extractor tab"""
+    if not require_library(PDFPLUMBER_AVAILABLE or PYMUPDF_AVAILABLE,
+                           "❌ Either pdfplumber or PyMuPDF is required for challan extraction.",
+                           "pip install pdfplumber PyMuPDF"):
+        return
+    
+    uploaded_challan_files = create_enhanced_upload_section(
+        "ESIC Challan File Upload", 
+        "Upload ESIC challan PDF files for transaction and payment data extraction.",
+        "challan_files"
+    )
     
+    if uploaded_challan_files:
+        st.info(f"📁 Selected {len(uploaded_challan_files)} file(s) for processing")
+        
+        if st.button("🔄 Process Challan PDFs", type="primary", key="process_challan"):
+            # Create containers
+            progress_container = st.container()
+            results_container = st.container()
+            download_container = st.container()
+            
+            with progress_container:
+                st.subheader("🔄 Processing Status")
+                extractor = get_challan_extractor()
+                results = []
+                
+                progress_bar = st.progress(0)
+                status_text = st.empty()
+                
+                batch_results = extractor.process_pdfs_batch(
+                    (uploaded_file.getvalue(), uploaded_file.name) for uploaded_file in uploaded_challan_files
+                )
+                
+                for i, uploaded_file in enumerate(uploaded_challan_files):
+                    if progress_update_due(i, len(uploaded_challan_files)):
+                        status_text.text(f"Processing: {uploaded_file.name}")
+                        progress_bar.progress((i + 1) / len(uploaded_challan_files))
+                    
+                    results.append(next(batch_results))
+                
+                status_text.empty()
+                progress_bar.empty()
+            
+            # Results summary
+            with results_container:
+                if results:
+                    st.subheader("📊 Processing Summary")
+                    
+                    # Calculate statistics
+                    successful = sum(1 for r in results if r['status'] == 'success')
+                    failed = sum(1 for r in results if r['status'] == 'error')
+                    not_esic = sum(1 for r in results if r['status'] == 'not_esic')
+                    
+                    render_metric_row([
+                        ("📄 Total Files", len(results), None, None),
+                        ("✅ Successful", successful, f"{(successful/len(results)*100):.1f}%",
+                         'good' if successful else None),
+                        ("❌ Failed", failed, f"{(failed/len(results)*100):.1f}%" if failed > 0 else "0%",
+                         'warning' if failed else None),
+                        ("⚠️ Not ESIC", not_esic, f"{(not_esic/len(results)*100):.1f}%" if not_esic > 0 else "0%",
+                         'warning' if not_esic else None),
+                    ])
+                    
+                    # Status indicator
+                    if successful == len(results):
+                        st.success(f"🎉 All {len(results)} files processed successfully!")
+                    elif successful > 0:
+                        st.warning(f"⚠️ {successful} files processed successfully, {failed + not_esic} had issues")
+                    else:
+                        st.error("❌ No files were processed successfully")
+            
+            # Download and preview section
+            with download_container:
+                if results:
+                    st.subheader("📥 Download & Preview")
+                    
+                    col1, col2 = st.columns([2, 1])
+                    
+                    with col1:
+                        # The report is only built when the button is clicked (see the ECR tab)
+                        st.download_button(
+                            label="📥 Download Challan Data",
+                            data=functools.partial(create_challan_excel_report, results),
+                            file_name=f"ESIC_Challan_Report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
+                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                            type="primary"
+                        )
+                    
+                    with col2:
+                        st.info(f"💡 Report contains:\n• All file processing results\n• Extracted field data\n• Error details")
+                    
+                    # Quick preview of the first 5 successful extractions; stop scanning once found
+                    preview_results = list(itertools.islice((r for r in results if r['status'] == 'success'), 5))
+                    if preview_results:
+                        st.subheader("📋 Quick Preview - Successfully Extracted Data")
+                        
+                        preview_data = []
+                        for result in preview_results:
+                            data = result['extracted_data']
+                            preview_data.append({
+                                'Filename': shorten_text(result['filename'], 30),
+                                'Transaction Status': data.get('transaction_status', 'N/A')[:20],
+                                'Employer Code': data.get('employer_code', 'N/A'),
+                                'Amount Paid': data.get('amount_paid', 'N/A'),
+                                'Transaction Number': shorten_text(data.get('transaction_number', 'N/A'), 15)
+                            })
+                        
+                        if preview_data:
+                            st.dataframe(pd.DataFrame(preview_data), use_container_width=True)
+                    
+                    # Detailed results in collapsible section, as one table rather than a block per file
+                    with st.expander("📝 View Detailed Extraction Results", expanded=False):
+                        detail_df = pd.DataFrame([challan_detail_row(result) for result in results],
+                                                 columns=CHALLAN_DETAIL_COLUMNS)
+                        st.dataframe(detail_df, use_container_width=True, hide_index=True)
+
+
+# ============================================================================
+# STREAMLIT APPLICATION
+# ============================================================================
+
+# Inter is fetched through its own stylesheet link instead of an @import, which
+# holds back the whole stylesheet until fonts.googleapis.com answers
+APP_FONT_LINK = (
+    '<link rel="stylesheet" '
+    'href="https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap">'
+)
+
+# Enhanced Custom CSS for professional appearance
+APP_STYLES = """
     /* Main container styling */
     .main > div {
         padding: 1rem 2rem;
@@ -1044,7 +1712,15 @@ def main():
         width: 200%;
         height: 200%;
         background: radial-gradient(circle, rgba(255,255,255,0.1) 0%, transparent 70%);
-        animation: shimmer 3s ease-in-out infinite;
+        /* The shimmer's start and end frame, so the glow rests where the last pass ends */
+        transform: translateX(-100%) translateY(-100%) rotate(45deg);
+    }
+    
+    /* A few passes draw the eye; an endless loop keeps the browser repainting */
+    @media (prefers-reduced-motion: no-preference) {
+        .custom-header::before {
+            animation: shimmer 3s ease-in-out 3;
+        }
     }
     
     @keyframes shimmer {
@@ -1075,12 +1751,6 @@ def main():
     }
 }
     
-    .logo-section img {
-        border-radius: 15px;
-        box-shadow: 0 5px 15px rgba(0,0,0,0.2);
-        transition: transform 0.3s ease;
-    }
-    
     .logo-section img:hover {
         transform: scale(1.05);
     }
@@ -1157,7 +1827,14 @@ def main():
         box-shadow: 0 15px 35px rgba(0,0,0,0.15);
     }
     
+    .stats-row {
+        display: flex;
+        flex-wrap: wrap;
+        gap: 1rem;
+    }
+    
     .stats-card {
+        flex: 1 1 10rem;
         background: linear-gradient(135deg, #f1f5f9 0%, #e2e8f0 100%);
         padding: 1.5rem;
         border-radius: 15px;
@@ -1172,6 +1849,30 @@ def main():
         box-shadow: 0 8px 25px rgba(0,0,0,0.1);
     }
     
+    .stats-label {
+        color: #64748b;
+        font-size: 0.9rem;
+    }
+    
+    .stats-value {
+        color: #1e293b;
+        font-size: 2rem;
+        font-weight: 600;
+    }
+    
+    .stats-delta {
+        color: #64748b;
+        font-size: 0.85rem;
+    }
+    
+    .stats-delta.good {
+        color: #059669;
+    }
+    
+    .stats-delta.warning {
+        color: #d97706;
+    }
+    
     /* Enhanced buttons */
     .stButton > button {
         background: linear-gradient(135deg, #10b981 0%, #059669 100%);
@@ -1201,34 +1902,6 @@ def main():
         box-shadow: 0 8px 25px rgba(59, 130, 246, 0.4);
     }
     
-    /* Enhanced metrics */
-    [data-testid="metric-container"] {
-        background: white;
-        padding: 1.5rem;
-        border-radius: 15px;
-        border: 1px solid #e2e8f0;
-        box-shadow: 0 2px 10px rgba(0,0,0,0.05);
-        transition: all 0.3s ease;
-    }
-    
-    [data-testid="metric-container"]:hover {
-        transform: translateY(-3px);
-        box-shadow: 0 8px 25px rgba(0,0,0,0.1);
-    }
-    
-    [data-testid="metric-container"] [data-testid="metric-container-label"] {
-        font-family: 'Inter', sans-serif;
-        font-weight: 500;
-        color: #64748b;
-    }
-    
-    [data-testid="metric-container"] [data-testid="metric-container-value"] {
-        font-family: 'Inter', sans-serif;
-        font-weight: 700;
-        font-size: 2rem;
-        color: #1e293b;
-    }
-    
     /* Enhanced file uploader */
     .stFileUploader > div {
         background: linear-gradient(135deg, #f8fafc 0%, #f1f5f9 100%);
@@ -1314,14 +1987,45 @@ def main():
             font-size: 2rem !important;
         }
     }
-    </style>
-    """, unsafe_allow_html=True)
+    """
+
+_RE_CSS_COMMENT = re.compile(r'/\*.*?\*/', re.DOTALL)
+_RE_CSS_PUNCT_SPACE = re.compile(r'\s*([{};,>])\s*')
+_RE_CSS_SPACE = re.compile(r'\s+')
+
+def minify_css(css):
+    """Drop comments and redundant whitespace from a stylesheet"""
+    css = _RE_CSS_COMMENT.sub('', css)
+    css = _RE_CSS_PUNCT_SPACE.sub(r'\1', css)
+    return _RE_CSS_SPACE.sub(' ', css).strip()
+
+# Sent to the browser on every rerun, so minified once here rather than per run
+APP_CSS = f"{APP_FONT_LINK}<style>{minify_css(APP_STYLES)}</style>"
+
+@st.cache_resource
+def load_logo(path="kkc logo.png"):
+    """Read and decode the header logo once per process"""
+    from PIL import Image
+    with Image.open(path) as image:
+        # copy() forces the full decode so the file can be closed
+        return image.copy()
+
+def main():
+    st.set_page_config(
+        page_title="ESIC PDF Data Extractor",
+        page_icon="📄",
+        layout="wide",
+        initial_sidebar_state="collapsed"
+    )
+    
+    # Enhanced Custom CSS for professional appearance; the style element has to be
+    # emitted on every rerun (Streamlit drops elements a run does not repeat)
+    st.markdown(APP_CSS, unsafe_allow_html=True)
     
     # Enhanced header with professional design
     # Enhanced header with professional design and proper logo placement
     try:
-        from PIL import Image
-        logo = Image.open("kkc logo.png")
+        logo = load_logo()
         
         st.markdown('<div class="custom-header">', unsafe_allow_html=True)
 
@@ -1368,8 +2072,8 @@ def main():
         missing_libraries.append("pdfplumber")
     if not PYMUPDF_AVAILABLE:
         missing_libraries.append("PyMuPDF (fitz)")
-    if not OPENPYXL_AVAILABLE:
-        missing_libraries.append("openpyxl")
+    if not XLSXWRITER_AVAILABLE:
+        missing_libraries.append("xlsxwriter")
     
     if missing_libraries:
         st.warning(f"⚠️ Missing libraries: {', '.join(missing_libraries)}. Install them for full functionality.")
@@ -1377,293 +2081,11 @@ def main():
     # Create tabs for different functionalities
     tab1, tab2 = st.tabs(["📊 ECR Extractor", "💰 Challan Extractor"])
     
-    # ============================================================================
-    # TAB 1: CONTRIBUTION HISTORY EXTRACTOR
-    # ============================================================================
     with tab1:
-        
-        if not PDFPLUMBER_AVAILABLE:
-            st.error("❌ pdfplumber is required for contribution history extraction. Please install it first.")
-            st.code("pip install pdfplumber")
-            return
-        
-        uploaded_files = create_enhanced_upload_section(
-            "ESIC ECR File Upload", 
-            "Upload ESIC ECR PDF files to extract employee contribution data including month information.",
-            "contribution_files"
-        )
-        
-        if uploaded_files:
-            st.info(f"📁 Selected {len(uploaded_files)} file(s) for processing")
-            
-            if st.button("🔄 Process ECR PDFs", type="primary", key="process_contribution"):
-                # Create containers for different sections
-                progress_container = st.container()
-                results_container = st.container()
-                download_container = st.container()
-                
-                with progress_container:
-                    st.subheader("🔄 Processing Status")
-                    progress_bar = st.progress(0)
-                    status_text = st.empty()
-                    
-                    # Processing results tracking
-                    all_data = []
-                    successful_files = []
-                    failed_files = []
-                    
-                    # Process files
-                    for i, uploaded_file in enumerate(uploaded_files):
-                        status_text.text(f"Processing: {uploaded_file.name}")
-                        progress_bar.progress((i + 1) / len(uploaded_files))
-                        
-                        try:
-                            extracted_data = extract_esic_data(uploaded_file)
-                            if extracted_data:
-                                all_data.append({
-                                    'filename': uploaded_file.name,
-                                    'data': extracted_data
-                                })
-                                successful_files.append(uploaded_file.name)
-                            else:
-                                failed_files.append(uploaded_file.name)
-                        
-                        except Exception as e:
-                            failed_files.append(f"{uploaded_file.name} (Error: {str(e)})")
-                    
-                    status_text.empty()
-                    progress_bar.empty()
-                
-                # Show results summary
-                with results_container:
-                    if all_data or failed_files:
-                        st.subheader("📊 Processing Summary")
-                        
-                        # Summary metrics
-                        col1, col2, col3, col4 = st.columns(4)
-                        
-                        total_employees = sum(len(data['data'].get('employee_data', [])) for data in all_data)
-                        total_files = len(uploaded_files)
-                        successful_count = len(successful_files)
-                        failed_count = len(failed_files)
-                        
-                        with col1:
-                            st.metric("📄 Total Files", total_files)
-                        with col2:
-                            st.metric("✅ Successful", successful_count, delta=f"{(successful_count/total_files*100):.1f}%")
-                        with col3:
-                            st.metric("❌ Failed", failed_count, delta=f"{(failed_count/total_files*100):.1f}%" if failed_count > 0 else "0%")
-                        with col4:
-                            st.metric("👥 Total Employees", total_employees)
-                        
-                        # Success/failure indicator
-                        if successful_count == total_files:
-                            st.success(f"🎉 All {total_files} files processed successfully!")
-                        elif successful_count > 0:
-                            st.warning(f"⚠️ {successful_count} files processed successfully, {failed_count} failed")
-                        else:
-                            st.error("❌ No files were processed successfully")
-                
-                # Download section and preview
-                with download_container:
-                    if all_data:
-                        st.subheader("📥 Download & Preview")
-                        
-                        col1, col2 = st.columns([2, 1])
-                        
-                        with col1:
-                            # Generate Excel file
-                            try:
-                                excel_file = create_combined_excel(all_data)
-                                
-                                st.download_button(
-                                    label="📥 Download Excel Report",
-                                    data=excel_file,
-                                    file_name=f"ESIC_ECR_Report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
-                                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                                    type="primary"
-                                )
-                                
-                            except Exception as e:
-                                st.error(f"❌ Error creating Excel file: {str(e)}")
-                        
-                        with col2:
-                            st.info(f"💡 Excel contains:\n• Combined data sheet with month info\n• Individual file sheets\n• {total_employees} employee records")
-                        
-                        # Data preview
-                        if all_data[0]['data'].get('employee_data'):
-                            st.subheader("📋 Data Preview (First 10 rows)")
-                            preview_df = pd.DataFrame(all_data[0]['data']['employee_data'][:10])
-                            # Show only key columns for preview including month
-                            key_columns = ['Month', 'SNo.', 'IP Number', 'IP Name', 'No. Of Days', 'Total Wages', 'IP Contribution']
-                            available_columns = [col for col in key_columns if col in preview_df.columns]
-                            if available_columns:
-                                st.dataframe(preview_df[available_columns], use_container_width=True)
-                    
-                    # Show processing details in collapsible section
-                    if successful_files or failed_files:
-                        with st.expander("📝 View Processing Details", expanded=False):
-                            if successful_files:
-                                st.success("✅ Successfully Processed Files:")
-                                for filename in successful_files:
-                                    # Show extracted month if available
-                                    file_data = next((item for item in all_data if item['filename'] == filename), None)
-                                    if file_data and 'header_info' in file_data['data']:
-                                        month = file_data['data']['header_info'].get('month', 'Unknown')
-                                        st.write(f"• {filename} (Month: {month})")
-                                    else:
-                                        st.write(f"• {filename}")
-                            
-                            if failed_files:
-                                st.error("❌ Failed Files:")
-                                for filename in failed_files:
-                                    st.write(f"• {filename}")
-    
-    # ============================================================================
-    # TAB 2: CHALLAN EXTRACTOR
-    # ============================================================================
+        render_ecr_tab()
+
     with tab2:
-        
-        if not PDFPLUMBER_AVAILABLE and not PYMUPDF_AVAILABLE:
-            st.error("❌ Either pdfplumber or PyMuPDF is required for challan extraction.")
-            st.code("pip install pdfplumber PyMuPDF")
-            return
-        
-        uploaded_challan_files = create_enhanced_upload_section(
-            "ESIC Challan File Upload", 
-            "Upload ESIC challan PDF files for transaction and payment data extraction.",
-            "challan_files"
-        )
-        
-        if uploaded_challan_files:
-            st.info(f"📁 Selected {len(uploaded_challan_files)} file(s) for processing")
-            
-            if st.button("🔄 Process Challan PDFs", type="primary", key="process_challan"):
-                # Create containers
-                progress_container = st.container()
-                results_container = st.container()
-                download_container = st.container()
-                
-                with progress_container:
-                    st.subheader("🔄 Processing Status")
-                    extractor = ESICChallanExtractor()
-                    results = []
-                    
-                    progress_bar = st.progress(0)
-                    status_text = st.empty()
-                    
-                    for i, uploaded_file in enumerate(uploaded_challan_files):
-                        status_text.text(f"Processing: {uploaded_file.name}")
-                        progress_bar.progress((i + 1) / len(uploaded_challan_files))
-                        
-                        pdf_bytes = uploaded_file.read()
-                        result = extractor.process_single_pdf(pdf_bytes, uploaded_file.name)
-                        results.append(result)
-                    
-                    status_text.empty()
-                    progress_bar.empty()
-                
-                # Results summary
-                with results_container:
-                    if results:
-                        st.subheader("📊 Processing Summary")
-                        
-                        # Calculate statistics
-                        successful = sum(1 for r in results if r['status'] == 'success')
-                        failed = sum(1 for r in results if r['status'] == 'error')
-                        not_esic = sum(1 for r in results if r['status'] == 'not_esic')
-                        
-                        col1, col2, col3, col4 = st.columns(4)
-                        with col1:
-                            st.metric("📄 Total Files", len(results))
-                        with col2:
-                            st.metric("✅ Successful", successful, delta=f"{(successful/len(results)*100):.1f}%")
-                        with col3:
-                            st.metric("❌ Failed", failed, delta=f"{(failed/len(results)*100):.1f}%" if failed > 0 else "0%")
-                        with col4:
-                            st.metric("⚠️ Not ESIC", not_esic, delta=f"{(not_esic/len(results)*100):.1f}%" if not_esic > 0 else "0%")
-                        
-                        # Status indicator
-                        if successful == len(results):
-                            st.success(f"🎉 All {len(results)} files processed successfully!")
-                        elif successful > 0:
-                            st.warning(f"⚠️ {successful} files processed successfully, {failed + not_esic} had issues")
-                        else:
-                            st.error("❌ No files were processed successfully")
-                
-                # Download and preview section
-                with download_container:
-                    if results:
-                        st.subheader("📥 Download & Preview")
-                        
-                        col1, col2 = st.columns([2, 1])
-                        
-                        with col1:
-                            # Generate Excel report
-                            try:
-                                excel_report = create_challan_excel_report(results)
-                                
-                                st.download_button(
-                                    label="📥 Download Challan Data",
-                                    data=excel_report,
-                                    file_name=f"ESIC_Challan_Report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
-                                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                                    type="primary"
-                                )
-                                
-                            except Exception as e:
-                                st.error(f"❌ Error creating Excel report: {str(e)}")
-                        
-                        with col2:
-                            st.info(f"💡 Report contains:\n• All file processing results\n• Extracted field data\n• Error details")
-                        
-                        # Quick preview of successful extractions
-                        successful_results = [r for r in results if r['status'] == 'success']
-                        if successful_results:
-                            st.subheader("📋 Quick Preview - Successfully Extracted Data")
-                            
-                            preview_data = []
-                            for result in successful_results[:5]:  # Show first 5 successful results
-                                data = result['extracted_data']
-                                preview_data.append({
-                                    'Filename': result['filename'][:30] + "..." if len(result['filename']) > 30 else result['filename'],
-                                    'Transaction Status': data.get('transaction_status', 'N/A')[:20],
-                                    'Employer Code': data.get('employer_code', 'N/A'),
-                                    'Amount Paid': data.get('amount_paid', 'N/A'),
-                                    'Transaction Number': data.get('transaction_number', 'N/A')[:15] + "..." if len(str(data.get('transaction_number', 'N/A'))) > 15 else data.get('transaction_number', 'N/A')
-                                })
-                            
-                            if preview_data:
-                                st.dataframe(pd.DataFrame(preview_data), use_container_width=True)
-                        
-                        # Detailed results in collapsible section
-                        with st.expander("📝 View Detailed Extraction Results", expanded=False):
-                            for result in results:
-                                status_icon = "✅" if result['status'] == 'success' else "❌" if result['status'] == 'error' else "⚠️"
-                                
-                                with st.container():
-                                    st.markdown(f"**{status_icon} {result['filename']}**")
-                                    
-                                    if result['status'] == 'success':
-                                        data = result['extracted_data']
-                                        
-                                        col1, col2 = st.columns(2)
-                                        with col1:
-                                            st.write("**Transaction Details:**")
-                                            st.write(f"• Status: {data.get('transaction_status', 'N/A')}")
-                                            st.write(f"• Transaction Number: {data.get('transaction_number', 'N/A')}")
-                                            st.write(f"• Amount Paid: {data.get('amount_paid', 'N/A')}")
-                                        
-                                        with col2:
-                                            st.write("**Employer Details:**")
-                                            st.write(f"• Employer Code: {data.get('employer_code', 'N/A')}")
-                                            st.write(f"• Challan Period: {data.get('challan_period', 'N/A')}")
-                                            st.write(f"• Tables Found: {len(result.get('tables', []))}")
-                                    
-                                    else:
-                                        st.error(f"Error: {result.get('error', 'Unknown error')}")
-                                    
-                                    st.markdown("---")
+        render_challan_tab()
 
     # ============================================================================
     # FOOTER
@@ -0,0 +1,13 @@
+import esic
+
+
+def test_case_folded_labels_still_match_without_ascii_keyword():
+    # 'ſ' (long s) matches 's' under re.IGNORECASE, but the lowercased text does not
+    # contain the plain ASCII keyword
+    text = "Employer'ſ Code: 31000123450001001\nTranſaction Number: TXN0001AB123456\nStatuſ: Success\n"
+
+    fields = esic.ESICChallanExtractor().extract_field_patterns(text)
+
+    assert fields['transaction_status'] == 'Success'
+    assert fields['transaction_number'] == 'TXN0001AB123456'
+    assert fields['employer_code'] == '31000123450001001'
@@ -0,0 +1,69 @@
+import types
+
+import esic
+
+
+# Every challan field labelled the way its first pattern expects, except the employer
+# code, which only matches the lower-priority "Code No" pattern
+FIRST_PAGE = """ESIC Challan
+Code No: 9999
+Employer's Name: ACME PVT LTD
+Challan Period: April 2024
+Challan No: 1234567890
+Created Date: 10/05/2024
+Submitted Date: 12/05/2024
+Amount Paid: 12,346.00
+Transaction Number: TXN0001AB123456
+Status: Success
+Item  Wages  10.00  20.00
+""" + "filler line of text here\n" * 60
+
+SECOND_PAGE = "Employer's Code: 31000123450001001\n"
+
+
+def fake_pdfplumber(page_texts):
+    pages = [types.SimpleNamespace(extract_text=lambda text=text: text) for text in page_texts]
+    pdf = types.SimpleNamespace(pages=pages)
+
+    class Document:
+        def __enter__(self):
+            return pdf
+
+        def __exit__(self, *exc_info):
+            return False
+
+    return types.SimpleNamespace(open=lambda *args, **kwargs: Document())
+
+
+def test_scan_waits_for_higher_priority_pattern_on_later_page():
+    scan = esic.ChallanPageScan(esic.ESICChallanExtractor()._is_valid_transaction_number)
+
+    assert not scan.add_page(FIRST_PAGE + "\n")
+    assert 'employer_code' in scan.pending_fields
+
+
+def test_later_page_label_wins_over_lower_priority_match(monkeypatch):
+    monkeypatch.setattr(esic, 'PYMUPDF_AVAILABLE', False)
+    monkeypatch.setattr(esic, 'PDFPLUMBER_AVAILABLE', True)
+    monkeypatch.setattr(esic, 'optional_module', lambda name: fake_pdfplumber([FIRST_PAGE, SECOND_PAGE]))
+
+    result = esic.ESICChallanExtractor()._process_pdf(b'%PDF', 'challan.pdf')
+
+    assert result['status'] == 'success'
+    assert result['extracted_data']['employer_code'] == '31000123450001001'
+
+
+def test_label_cut_off_at_page_end_is_not_settled(monkeypatch):
+    first_page = FIRST_PAGE.replace("Code No: 9999", "Employer's Code: 1111").replace("Status: Success\n", "") + "Status:"
+    scan = esic.ChallanPageScan(esic.ESICChallanExtractor()._is_valid_transaction_number)
+
+    assert not scan.add_page(first_page + "\n")
+    assert 'transaction_status' in scan.pending_fields
+
+    monkeypatch.setattr(esic, 'PYMUPDF_AVAILABLE', False)
+    monkeypatch.setattr(esic, 'PDFPLUMBER_AVAILABLE', True)
+    monkeypatch.setattr(esic, 'optional_module', lambda name: fake_pdfplumber([first_page, "Paid"]))
+
+    result = esic.ESICChallanExtractor()._process_pdf(b'%PDF', 'challan.pdf')
+
+    assert result['extracted_data']['transaction_status'] == 'Paid'
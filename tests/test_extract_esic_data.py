@@ -0,0 +1,78 @@
+import types
+
+import esic
+
+
+SUMMARY_LABELS = ("Total IP Contribution Total Employer Contribution Total Contribution "
+                  "Total Government Contribution Total Monthly Wages")
+
+
+def ecr_pages(code, period, ip_prefix, page_rows):
+    """Pages of one ECR, header and summary on the first, `page_rows` employee rows per page"""
+    pages = []
+    row_no = 1
+    for page_no, row_count in enumerate(page_rows, 1):
+        lines = []
+        if page_no == 1:
+            lines += ["Employees' State Insurance Corporation",
+                      f"ECR Of {code} for {period}",
+                      SUMMARY_LABELS,
+                      "100.00 200.00 300.00 0.00 4000.00"]
+        for _ in range(row_count):
+            lines.append(f"{row_no} - {ip_prefix}{row_no:05d} NAME {row_no} 26 1000.00 7.50")
+            row_no += 1
+        lines.append(f"Page {page_no} of {len(page_rows)}")
+        pages.append("\n".join(lines))
+    return pages
+
+
+def use_pdfplumber_pages(monkeypatch, page_texts):
+    pages = [types.SimpleNamespace(extract_text=lambda text=text: text) for text in page_texts]
+    pdf = types.SimpleNamespace(pages=pages)
+
+    class Document:
+        def __enter__(self):
+            return pdf
+
+        def __exit__(self, *exc_info):
+            return False
+
+    monkeypatch.setattr(esic, 'PYMUPDF_AVAILABLE', False)
+    monkeypatch.setattr(esic, 'PDFPLUMBER_AVAILABLE', True)
+    monkeypatch.setattr(esic, 'optional_module',
+                        lambda name: types.SimpleNamespace(open=lambda *args, **kwargs: Document()))
+
+
+def test_merged_ecrs_keep_rows_after_last_page_footer(monkeypatch):
+    use_pdfplumber_pages(monkeypatch, ecr_pages('11111', 'Apr2024', '11111', [2, 1])
+                         + ecr_pages('22222', 'May2024', '22222', [3]))
+
+    data = esic.extract_esic_data(b'%PDF')
+
+    assert len(data['employee_data']) == 6
+    assert data['header_info']['establishment_code'] == '22222'
+    assert data['footer_info']['page_info'] == 'Page 1 of 1'
+
+
+def test_next_ecr_header_on_same_page_is_read(monkeypatch):
+    first, second = ecr_pages('11111', 'Apr2024', '11111', [2]), ecr_pages('22222', 'May2024', '22222', [2])
+    use_pdfplumber_pages(monkeypatch, ecr_pages('00000', 'Mar2024', '00000', [1])
+                         + [first[0] + "\n" + second[0]])
+
+    data = esic.extract_esic_data(b'%PDF')
+
+    # The page's employee table ends at the first footer; the header after it still counts
+    assert len(data['employee_data']) == 3
+    assert data['header_info']['establishment_code'] == '22222'
+    assert data['header_info']['month'] == 'May'
+
+
+def test_extraction_error_is_returned_with_result(monkeypatch):
+    def broken_open(*args, **kwargs):
+        raise ValueError("not a PDF")
+
+    monkeypatch.setattr(esic, 'PYMUPDF_AVAILABLE', False)
+    monkeypatch.setattr(esic, 'PDFPLUMBER_AVAILABLE', True)
+    monkeypatch.setattr(esic, 'optional_module', lambda name: types.SimpleNamespace(open=broken_open))
+
+    assert esic.extract_esic_data_with_errors(b'junk') == (None, ["Error extracting data: not a PDF"])